@@ -21,15 +21,59 @@ create_customer_task = BashOperator(
     dag=create_customer_dag,
 )
 
+PRODUCER_DIR = '/opt/airflow/python/synthetic_data_generator/ecommerce/services/order_management'
+PRODUCER_PID = '/tmp/order_producer_daemon.pid'
+PRODUCER_URL = 'http://localhost:8081'
+
+# Customer order producer. The producer runs as a long lived daemon, these DAGs
+# only start it, stop it or change its target rate (orders/sec).
 customer_order_dag = DAG(
     dag_id='customer_order',
     default_args=default_args,
-    schedule_interval='*/1 * 13 5 2',
+    schedule_interval=None,
+    params={'rate': 1.0},
 )
 
-# Customer order task (BashOperator)
+# Start the daemon unless one is already alive. Liveness is checked through the PID file
+# and the port rather than /health, so an unhealthy or paused daemon is never started twice.
 customer_order_task = BashOperator(
     task_id='customer_order',
-    bash_command='python3 /opt/airflow/python/synthetic_data_generator/ecommerce/services/order_management/producer.py',
+    bash_command=(
+        f'if (test -f {PRODUCER_PID} && kill -0 $(cat {PRODUCER_PID}) 2>/dev/null) '
+        f'|| curl -s -o /dev/null {PRODUCER_URL}/metrics; then echo "order producer daemon already running"; '
+        f'else cd {PRODUCER_DIR} || exit 1; setsid nohup python3 producer_daemon.py '
+        '--rate {{ dag_run.conf.get("rate", params.rate) }} '
+        f'> /tmp/order_producer_daemon.log 2>&1 & echo $! > {PRODUCER_PID}; fi'
+    ),
     dag=customer_order_dag,
 )
+
+customer_order_rate_dag = DAG(
+    dag_id='customer_order_rate',
+    default_args=default_args,
+    schedule_interval=None,
+    params={'rate': 1.0},
+)
+
+# Change the target rate of the running daemon, 0 pauses it
+customer_order_rate_task = BashOperator(
+    task_id='customer_order_rate',
+    bash_command=(
+        f'curl -sf -X PUT {PRODUCER_URL}/rate '
+        '-d \'{"rate": {{ dag_run.conf.get("rate", params.rate) }}}\''
+    ),
+    dag=customer_order_rate_dag,
+)
+
+customer_order_stop_dag = DAG(
+    dag_id='customer_order_stop',
+    default_args=default_args,
+    schedule_interval=None,
+)
+
+# SIGTERM lets the daemon finish the current order and flush Kafka before exiting
+customer_order_stop_task = BashOperator(
+    task_id='customer_order_stop',
+    bash_command=f'test -f {PRODUCER_PID} && kill -TERM $(cat {PRODUCER_PID}) && rm -f {PRODUCER_PID}',
+    dag=customer_order_stop_dag,
+)
@@ -1,4 +1,5 @@
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from services.user_management.routes import router as user_router
 from services.inventory_managment.routes import router as inventory_router
 from services.order_management.routes import router as order_router
@@ -7,7 +8,14 @@ from services.transaction_management.routes import router as payment_details
 from services.shipping_management.shipment_gateway import router as shipment_gateway
 from services.shipping_management.routes import router as shipment_details
 
-app = FastAPI()
+# orjson serializes response bodies several times faster than the standard json encoder
+try:
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse as DefaultResponse
+except ImportError:
+    DefaultResponse = JSONResponse
+
+app = FastAPI(default_response_class=DefaultResponse)
 
 app.include_router(user_router,prefix='/user')
 app.include_router(inventory_router,prefix='/inventory')
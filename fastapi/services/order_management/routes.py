@@ -4,6 +4,7 @@ from dotenv import load_dotenv
 from datetime import datetime
 from decimal import Decimal
 from typing import List
+from services.outbox import add_outbox_event, current_event_time
 import mysql.connector
 import requests
 import random
@@ -157,12 +158,43 @@ class OrderStatus(DatabaseConnection):
             WHERE order_id = %s
             '''
             self.cursor.execute(sql,(updated_at,order_status,last_updated_at,order_id,))
+            if self.cursor.rowcount:
+                self.order_event(order_id,order_status)
             self.commit_and_close()
             return 'order status inserted successfully'
         except mysql.connector.Error as e:
             self.rollback_and_close()
             raise e
 
+    def order_event(self,order_id,order_status):
+        """
+        Adds the order_created event for the new status to the outbox in the current transaction.
+        """
+        sql = '''
+        SELECT os.items_subtotal,os.tax,os.discount,os.grand_total,co.created_at,co.customer_id
+        FROM customer_order co
+        LEFT JOIN order_summary os ON os.order_id = co.order_id
+        WHERE co.order_id = %s
+        '''
+        self.cursor.execute(sql,(order_id,))
+        row = self.cursor.fetchone()
+        if row is None:
+            # Raised as a database error, so the caller rolls back and closes the connection
+            raise mysql.connector.errors.DataError(msg=f'order {order_id} not found for its order_created event')
+        add_outbox_event(self.cursor,'order_created',order_id,{
+            'orderId':order_id,
+            'customerId':row[5],
+            'orderStatus':order_status,
+            'orderSummary':{
+                'itemsSubtotal':str(row[0]),
+                'tax':str(row[1]),
+                'discount':str(row[2]),
+                'grandTotal':str(row[3])
+            },
+            'created_at':row[4].isoformat() if row[4] else None,
+            'eventTime':current_event_time()
+        })
+
 class OrderSummary(DatabaseConnection):
     """
     Class for handling order summary insertions and operations related to order summary.
@@ -182,12 +214,72 @@ class OrderSummary(DatabaseConnection):
             '''
             self.cursor.execute(sql,(items_subtotal,tax,discount,grand_total,created_at,
                                      last_updated_at,order_id,))
+            if self.cursor.rowcount:
+                self.inventory_event(order_id)
+                self.customer_event(order_id)
             self.commit_and_close()
             return 'order summary inserted successfully'
         except mysql.connector.Error as e:
             self.rollback_and_close()
             raise e
 
+    def inventory_event(self,order_id):
+        """
+        Adds the inventory_created event with the ordered items to the outbox in the current transaction.
+        """
+        sql = '''
+        SELECT products.name,materials.name,sellers.name,op.quantity,op.total_price
+        FROM order_products op
+        INNER JOIN inventory_management.product_price pp ON op.product_price_id = pp.id
+        INNER JOIN inventory_management.products products ON pp.product_id = products.id
+        INNER JOIN inventory_management.materials materials ON pp.material_id = materials.id
+        INNER JOIN inventory_management.sellers sellers ON pp.seller_id = sellers.id
+        WHERE op.order_id = %s
+        '''
+        self.cursor.execute(sql,(order_id,))
+        add_outbox_event(self.cursor,'inventory_created',order_id,{
+            'orderId':order_id,
+            'itemsOrdered':[{
+                'product':row[0],
+                'material':row[1],
+                'soldBy':row[2],
+                'quantity':row[3],
+                'totalPrice':str(row[4])
+            } for row in self.cursor.fetchall()],
+            'eventTime':current_event_time()
+        })
+
+    def customer_event(self,order_id):
+        """
+        Adds the customer_created event for the ordering customer to the outbox in the current transaction.
+        """
+        sql = '''
+        SELECT cb.id,cb.name,cb.mobile_number,cb.email_id,country.name
+        FROM customer_order co
+        INNER JOIN user_management.customer_bio cb ON co.customer_id = cb.id
+        INNER JOIN user_management.address address ON address.customer_id = cb.id
+        INNER JOIN user_management.street street ON address.street_id = street.id
+        INNER JOIN user_management.postalcode postalcode ON street.postalcode_id = postalcode.id
+        INNER JOIN user_management.city city ON postalcode.city_id = city.id
+        INNER JOIN user_management.state state ON city.state_id = state.id
+        INNER JOIN user_management.country country ON state.country_id = country.id
+        WHERE co.order_id = %s
+        LIMIT 1
+        '''
+        self.cursor.execute(sql,(order_id,))
+        row = self.cursor.fetchone()
+        if row is None:
+            return
+        add_outbox_event(self.cursor,'customer_created',order_id,{
+            'orderId':order_id,
+            'customerId':row[0],
+            'name':row[1],
+            'mobileNumber':row[2],
+            'emailId':row[3],
+            'address':row[4],
+            'eventTime':current_event_time()
+        })
+
 # Dependency function to verify the API key passed in the request headers
 def verify_api_key(x_api_key: str = Header(...)):
      # Compare provided API key with the expected one
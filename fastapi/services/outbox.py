@@ -0,0 +1,23 @@
+from datetime import datetime, timezone
+import json
+
+def current_event_time():
+    """
+    Returns the current UTC time in ISO 8601 format, the eventTime carried by every topic payload.
+    """
+    return datetime.now(timezone.utc).isoformat()
+
+def add_outbox_event(cursor, topic, message_key, payload):
+    """
+    Inserts an event into the service's outbox table.
+
+    The insert runs on the caller's cursor, so the event is committed or rolled
+    back together with the rows it describes. The outbox relay publishes it to
+    Kafka afterwards.
+
+    The message key is the order id (customer id for customer_registered) so
+    each topic spreads over all of its partitions.
+    """
+    sql = '''INSERT INTO outbox(topic,message_key,payload,created_at)
+    VALUES (%s,%s,%s,%s)'''
+    cursor.execute(sql,(topic,message_key,json.dumps(payload,default=str),datetime.now().isoformat(),))
@@ -2,8 +2,9 @@ from fastapi import APIRouter, Depends, Header, HTTPException, status
 from pydantic import BaseModel
 from dotenv import load_dotenv
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 # from decimal import Decimal
+from services.outbox import add_outbox_event, current_event_time
 import mysql.connector
 import json
 import os
@@ -44,6 +45,18 @@ class PaymentGatewayDetails(BaseModel):
     status: Optional[str] = None
     updated_at: datetime
 
+class ShipmentStatusEvent(BaseModel):
+    """
+    Pydantic model representing a single status change of an existing shipment tracker.
+
+    This model is used by the bulk record endpoint, where the shipment order and
+    tracker already exist and only the new status row has to be stored.
+    """
+    trackerId: str
+    status: str
+    created_at: datetime
+    updated_at: datetime
+
 class DatabaseConnection:
     """
     A class to handle database connection and provide commit/rollback functionality.
@@ -133,9 +146,10 @@ class ShipmentStatus(DatabaseConnection):
     Class for handling shipment status insertions and operations related to shipment status.
     """
 
-    def insert(self,tracker_id,updated_at,shipping_status,created_at):
+    def insert(self,tracker_id,updated_at,shipping_status,created_at,event=None):
         """
         Inserts a shipment status into the database.
+        When an event payload is given it is added to the outbox in the same transaction.
         """
         last_updated_at = datetime.now().isoformat()
         try:
@@ -146,12 +160,49 @@ class ShipmentStatus(DatabaseConnection):
             WHERE st.tracker_id = %s
             '''
             self.cursor.execute(sql,(updated_at,shipping_status,created_at,last_updated_at,tracker_id,))
+            if event is not None and self.cursor.rowcount:
+                add_outbox_event(self.cursor,'shipment_created',event['orderId'],event)
             self.commit_and_close()
             return 'shipment status inserted successfully'
         except mysql.connector.Error as e:
             self.rollback_and_close()
             raise e
 
+    def insert_many(self,events):
+        """
+        Inserts a batch of shipment statuses in a single multi-row statement and transaction.
+
+        Each row's last_updated_at is the status change's own updated_at, kept to the
+        microsecond, so several statuses of one tracker in a batch never collide on
+        UNIQUE(tracker_id,last_updated_at). Events of unknown trackers are skipped and
+        counted; any other failed row rolls back the whole batch.
+
+        No outbox rows are written: the only caller, the shipment lifecycle simulator,
+        produces the same events to Kafka itself, so the relay would publish them twice.
+        """
+        try:
+            tracker_ids = list({event['trackerId'] for event in events})
+            self.cursor.execute(
+                f"SELECT tracker_id FROM shipment_tracker WHERE tracker_id IN ({','.join(['%s'] * len(tracker_ids))})",
+                tracker_ids
+            )
+            known = {row[0] for row in self.cursor.fetchall()}
+            sql = '''INSERT INTO shipment_status(
+            tracker_id,updated_at,shipment_status,created_at,last_updated_at)
+            VALUES (%s,%s,%s,%s,%s)
+            '''
+            values = [
+                (event['trackerId'],event['updated_at'],event['status'],event['created_at'],event['updated_at'],)
+                for event in events if event['trackerId'] in known
+            ]
+            if values:
+                self.cursor.executemany(sql,values)
+            self.commit_and_close()
+            return f'{len(values)} shipment statuses inserted successfully, {len(events) - len(values)} with unknown trackers skipped'
+        except mysql.connector.Error as e:
+            self.rollback_and_close()
+            raise e
+
 # Dependency function to verify the API key passed in the request headers
 def verify_api_key(x_api_key: str = Header(...)):
      # Compare provided API key with the expected one
@@ -179,10 +230,30 @@ def payment_gateway_details(gateway_details:PaymentGatewayDetails) -> dict:
     shipping_status = data.get('status')
     created_at = data.get('created_at')
     updated_at = data.get('updated_at')
+
+    # Event published to the shipment_created topic by the outbox relay
+    shipment_event = {
+        'orderId':order_id,
+        'trackerId':tracker_id,
+        'deliveryTo':delivery_to,
+        'shippingStatus':shipping_status,
+        'updated_at':updated_at.isoformat(),
+        'eventTime':current_event_time()
+    }
         
     # Safely insert each record with error context
     safe_insert("ShipmentOrder", lambda: ShipmentOrder().insert(order_id,delivery_to,created_at))
     safe_insert("ShipmentTracker", lambda: ShipmentTracker().insert(tracker_id,order_id,created_at))
-    safe_insert("ShipmentStatus", lambda: ShipmentStatus().insert(tracker_id,updated_at,shipping_status,created_at))
+    safe_insert("ShipmentStatus", lambda: ShipmentStatus().insert(tracker_id,updated_at,shipping_status,created_at,shipment_event))
     
     return {"message": "shipment details recorded successfully"}
+
+@router.post('/shipment-gateway/record/bulk/', dependencies=[Depends(verify_api_key)])
+def shipment_status_bulk(events:List[ShipmentStatusEvent]) -> dict:
+    # Convert the incoming Pydantic models to Python dictionaries
+    data = [event.dict() for event in events]
+    if not data:
+        return {"message": "no shipment statuses to record"}
+
+    result = safe_insert("ShipmentStatus", lambda: ShipmentStatus().insert_many(data))
+    return {"message": result}
@@ -4,6 +4,7 @@ from dotenv import load_dotenv
 from datetime import datetime
 from typing import Optional
 # from decimal import Decimal
+from services.outbox import add_outbox_event, current_event_time
 import mysql.connector
 import requests
 import random
@@ -139,9 +140,10 @@ class PaymentTransaction(DatabaseConnection):
     """
 
     def insert(self,transaction_id,order_id,amount,created_at,
-                processed_at,payment_method,payment_status,payment_type):
+                processed_at,payment_method,payment_status,payment_type,event=None):
         """
         Inserts a payment transaction into the database.
+        When an event payload is given it is added to the outbox in the same transaction.
         """
         last_updated_at = datetime.now().isoformat()
         try:
@@ -158,6 +160,8 @@ class PaymentTransaction(DatabaseConnection):
             self.cursor.execute(sql,(transaction_id,amount,created_at,
                                     processed_at,last_updated_at,order_id,payment_method,payment_status,
                                     payment_type,))
+            if event is not None and self.cursor.rowcount:
+                add_outbox_event(self.cursor,'payment_created',order_id,event)
             self.commit_and_close()
             return 'payment transaction inserted successfully'
         except mysql.connector.Error as e:
@@ -194,6 +198,18 @@ def payment_gateway_details(gateway_details:PaymentGatewayDetails) -> dict:
     payment_status = data.get('paymentStatus')
     created_at = data.get('createdAt')
     processed_at = data.get('processedAt')
+
+    # Event published to the payment_created topic by the outbox relay
+    payment_event = {
+        'orderId':order_id,
+        'transactionId':transaction_id,
+        'paymentType':payment_type,
+        'paymentMethod':payment_method,
+        'amount':formatted_amount,
+        'paymentStatus':payment_status,
+        'processedAt':processed_at.isoformat(),
+        'eventTime':current_event_time()
+    }
         
     # Safely insert each record with error context
     safe_insert("PaymentType", lambda: PaymentType().insert(payment_type, created_at))
@@ -201,7 +217,7 @@ def payment_gateway_details(gateway_details:PaymentGatewayDetails) -> dict:
     safe_insert("PaymentStatus", lambda: PaymentStatus().insert(payment_status, created_at))
     safe_insert("PaymentTransaction", lambda: PaymentTransaction().insert(
             transaction_id, order_id, amount, created_at,
-            processed_at, payment_method, payment_status, payment_type
+            processed_at, payment_method, payment_status, payment_type, payment_event
         ))        
     return {"message": "Payment details recorded successfully"}
 
@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, Header, HTTPException, status
 from pydantic import BaseModel
 from datetime import date,datetime
 from dotenv import load_dotenv
+from services.outbox import add_outbox_event, current_event_time
 import os
 import mysql.connector
 
@@ -310,6 +311,8 @@ class Address(DatabaseConnection):
                 data['country'],
             )
             self.cursor.execute(sql,values)
+            if self.cursor.rowcount:
+                self.customer_event(data)
             
             self.commit_and_close()  # Commit the transaction and close the connection
             
@@ -318,6 +321,27 @@ class Address(DatabaseConnection):
             self.rollback_and_close()
             raise e
 
+    def customer_event(self, data):
+        """
+        Adds the customer_registered event for the new customer to the outbox in the current transaction.
+        """
+        query = 'SELECT id FROM customer_bio WHERE mobile_number = %s AND email_id = %s'
+        self.cursor.execute(query, (data['mobile_number'], data['email_id'],))
+        row = self.cursor.fetchone()
+        if row is None:
+            # Raised as a database error, so the caller rolls back and closes the connection
+            raise mysql.connector.errors.DataError(msg='customer not found for its customer_registered event')
+        customer_id = row[0]
+        add_outbox_event(self.cursor, 'customer_registered', str(customer_id), {
+            'customerId': customer_id,
+            'name': data['customer_name'],
+            'mobileNumber': data['mobile_number'],
+            'emailId': data['email_id'],
+            'country': data['country'],
+            'created_at': data['created_at'].isoformat(),
+            'eventTime': current_event_time()
+        })
+
 # Dependency function to verify the API key passed in the request headers
 def verify_api_key(x_api_key: str = Header(...)):
      # Compare provided API key with the expected one
@@ -0,0 +1,83 @@
+import numpy as np
+import argparse
+import time
+import json
+from heavy_hitters import SpaceSaving
+
+def order_stream(skus, events, skew, seed):
+    """
+    Returns the SKU and quantity of each order item, SKU popularity following a Zipf law with exponent skew.
+    """
+    rng = np.random.default_rng(seed)
+    keys = (rng.zipf(skew, events) - 1) % skus
+    keys = rng.permutation(skus)[keys]  # spread the popular SKUs over the id range
+    return keys, rng.integers(1, 6, events)
+
+def exact_top_k(keys, weights, k):
+    totals = {}
+    for key, weight in zip(keys.tolist(), weights.tolist()):
+        totals[key] = totals.get(key, 0) + weight
+    top = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:k]
+    return totals, top
+
+def approximate_top_k(keys, weights, k, counters, batch_size):
+    """
+    Feeds the stream in micro-batches, each pre-aggregated per SKU as the streaming job does.
+    """
+    summary = SpaceSaving(counters)
+    for first in range(0, len(keys), batch_size):
+        batch_keys, inverse = np.unique(keys[first:first + batch_size], return_inverse=True)
+        batch_weights = np.bincount(inverse, weights=weights[first:first + batch_size])
+        for key, weight in zip(batch_keys.tolist(), batch_weights.astype(np.int64).tolist()):
+            summary.add(key, weight)
+    return summary, summary.top(k)
+
+def run_benchmark(skus, events, skew, k, counter_sizes, batch_size, seed):
+    """
+    Compares the exact per-SKU totals with Space-Saving summaries of several
+    sizes on the same stream: recall of the true top k, relative error of the
+    estimates, the guaranteed error bound and the size of the state each keeps.
+    """
+    keys, weights = order_stream(skus, events, skew, seed)
+
+    started = time.perf_counter()
+    totals, exact = exact_top_k(keys, weights, k)
+    results = [{
+        'method': 'exact',
+        'counters': len(totals),
+        'stateBytes': len(json.dumps([[key, total] for key, total in totals.items()])),
+        'recallAtK': 1.0,
+        'maxRelativeError': 0.0,
+        'errorBound': 0,
+        'seconds': round(time.perf_counter() - started, 3)
+    }]
+    exact_keys = {key for key, total in exact}
+
+    for counters in counter_sizes:
+        started = time.perf_counter()
+        summary, approximate = approximate_top_k(keys, weights, k, counters, batch_size)
+        elapsed = time.perf_counter() - started
+        results.append({
+            'method': 'space-saving',
+            'counters': counters,
+            'stateBytes': len(json.dumps(summary.to_state())),
+            'recallAtK': round(len(exact_keys & {key for key, estimate, error in approximate}) / k, 3),
+            'maxRelativeError': round(max(abs(estimate - totals[key]) / totals[key] for key, estimate, error in approximate), 5),
+            'errorBound': summary.max_error(),
+            'seconds': round(elapsed, 3)
+        })
+    return {'skus': skus, 'events': events, 'skew': skew, 'k': k, 'streamTotal': int(weights.sum()), 'results': results}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Accuracy and memory of the approximate top-K against exact totals.')
+    parser.add_argument('--skus', type=int, default=1000000, help='catalog size')
+    parser.add_argument('--events', type=int, default=2000000, help='order items in the stream')
+    parser.add_argument('--skew', type=float, default=1.2, help='Zipf exponent of SKU popularity, above 1')
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--counters', default='100,1000,10000', help='comma separated summary sizes to compare')
+    parser.add_argument('--batch-size', type=int, default=100000, help='order items per simulated micro-batch')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print(json.dumps(run_benchmark(args.skus, args.events, args.skew, args.k,
+                                   [int(size) for size in args.counters.split(',')], args.batch_size, args.seed), indent=4))
@@ -0,0 +1,82 @@
+from math import ceil
+import heapq
+
+class SpaceSaving:
+    """
+    Weighted Space-Saving summary of the heaviest keys of a stream.
+
+    At most capacity counters are kept. A key without a counter takes over the
+    smallest one when the summary is full and inherits its count as error, so
+    every estimate overcounts the true total by at most its error, and every
+    error is at most total / capacity. Any key whose true total exceeds
+    total / capacity is guaranteed to hold a counter.
+
+    A min-heap with lazy deletion finds the smallest counter; stale entries are
+    dropped when the heap grows past four times the capacity.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.total = 0
+        self.counters = {}
+        self.heap = []
+
+    @classmethod
+    def for_error(cls, epsilon, max_counters=None):
+        """
+        Summary whose errors stay within epsilon of the stream total, capped at max_counters counters.
+        """
+        capacity = ceil(1 / epsilon)
+        return cls(min(capacity, max_counters) if max_counters else capacity)
+
+    def add(self, key, weight=1):
+        self.total += weight
+        if key in self.counters:
+            counter = self.counters[key]
+            counter[0] += weight
+        elif len(self.counters) < self.capacity:
+            counter = self.counters[key] = [weight, 0]
+        else:
+            while True:
+                count, victim = heapq.heappop(self.heap)
+                if victim in self.counters and self.counters[victim][0] == count:
+                    break
+            del self.counters[victim]
+            counter = self.counters[key] = [count + weight, count]
+        heapq.heappush(self.heap, (counter[0], key))
+        if len(self.heap) > 4 * self.capacity:
+            self.heap = [(count, key) for key, (count, error) in self.counters.items()]
+            heapq.heapify(self.heap)
+
+    def max_error(self):
+        """
+        Largest possible overcount of any estimate.
+        """
+        if len(self.counters) < self.capacity:
+            return 0
+        return min(count for count, error in self.counters.values())
+
+    def top(self, k):
+        """
+        Returns the k heaviest keys as (key, estimate, error) tuples, heaviest first.
+        """
+        return [(key, count, error) for key, (count, error)
+                in heapq.nlargest(k, self.counters.items(), key=lambda item: item[1][0])]
+
+    def to_state(self):
+        return {
+            'capacity': self.capacity,
+            'total': self.total,
+            'counters': [[list(key) if isinstance(key, tuple) else key, count, error]
+                         for key, (count, error) in self.counters.items()]
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        summary = cls(state['capacity'])
+        summary.total = state['total']
+        summary.counters = {tuple(key) if isinstance(key, list) else key: [count, error]
+                            for key, count, error in state['counters']}
+        summary.heap = [(count, key) for key, (count, error) in summary.counters.items()]
+        heapq.heapify(summary.heap)
+        return summary
@@ -1,6 +1,104 @@
-from pyspark.sql import SparkSession, Window
-from pyspark.sql.functions import coalesce,from_json, col, explode, expr, sum, desc, row_number, regexp_replace, current_timestamp, lit
-from pyspark.sql.types import StructType, StructField, StringType, TimestampType, ArrayType, IntegerType
+from pyspark.sql import SparkSession, DataFrame, Window
+from pyspark.sql.functions import from_json, to_json, struct, col, explode, expr, sum, desc, row_number, regexp_replace, current_timestamp, window, lit, broadcast, coalesce
+from pyspark.sql.avro.functions import from_avro
+from pyspark.sql.types import StructType, StructField, StringType, TimestampType, ArrayType, IntegerType, DoubleType
+from functools import reduce
+import time
+import json
+import os
+
+# Value encoding written by the producers, 'json' (default) or 'avro'. Avro needs the
+# org.apache.spark:spark-avro package and reads the versioned schemas under schemas/avro.
+EVENT_ENCODING = os.getenv("EVENT_ENCODING", "json")
+AVRO_SCHEMA_DIR = os.getenv(
+    "AVRO_SCHEMA_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "schemas", "avro", os.getenv("EVENT_SCHEMA_VERSION", "v1"))
+)
+
+# Input of the aggregation: 'topics' (default) joins the five per-entity topics,
+# 'envelope' reads the consolidated order_event topic and needs no stream-stream joins
+ORDER_TOPIC_MODE = os.getenv("ORDER_TOPIC_MODE", "topics")
+# Offsets a new checkpoint starts from, overridable per topic with STARTING_OFFSETS_<TOPIC>,
+# e.g. STARTING_OFFSETS_CUSTOMER_CREATED=latest or a JSON offsets spec
+STARTING_OFFSETS = os.getenv("STARTING_OFFSETS", "earliest")
+
+KAFKA_BOOTSTRAP_SERVERS = os.getenv("KAFKA_BOOTSTRAP_SERVERS", "HOST:PORT")
+CHECKPOINT_ROOT = os.getenv("CHECKPOINT_ROOT", "hdfs://hadoop-master:9000/user/data/checkpoint_dir")
+
+# Joined order items are handed from the join query to the totals query through this topic
+SALES_TOPIC = os.getenv("SALES_TOPIC", "order_sales")
+
+# Cassandra tables, see cassandra_schema.cql
+CASSANDRA_KEYSPACE = os.getenv("CASSANDRA_KEYSPACE", "YOURKEYSPACE")
+TOTALS_TABLE = os.getenv("TOTALS_TABLE", "product_totals")
+QUANTITY_RANK_TABLE = os.getenv("QUANTITY_RANK_TABLE", "top_products_by_quantity")
+AMOUNT_RANK_TABLE = os.getenv("AMOUNT_RANK_TABLE", "top_products_by_amount")
+
+# Micro-batch sizing of the Kafka sources: 'fixed' reads at most MAX_OFFSETS_PER_TRIGGER
+# offsets of each topic per batch, 'adaptive' starts there and lets IngestionController resize within
+# ADAPTIVE_MIN_OFFSETS..ADAPTIVE_MAX_OFFSETS to keep batches near TARGET_BATCH_SECONDS,
+# 'catchup' first drains the backlog at full speed and then continues adaptively.
+INGEST_MODE = os.getenv("INGEST_MODE", "fixed")
+TRIGGER_INTERVAL = os.getenv("TRIGGER_INTERVAL", "30 seconds")
+MAX_OFFSETS_PER_TRIGGER = int(os.getenv("MAX_OFFSETS_PER_TRIGGER", "100000"))
+ADAPTIVE_MIN_OFFSETS = int(os.getenv("ADAPTIVE_MIN_OFFSETS", "10000"))
+ADAPTIVE_MAX_OFFSETS = int(os.getenv("ADAPTIVE_MAX_OFFSETS", "2000000"))
+TARGET_BATCH_SECONDS = float(os.getenv("TARGET_BATCH_SECONDS", "20"))
+RESIZE_RATIO = float(os.getenv("RESIZE_RATIO", "1.5"))
+RESIZE_MIN_SECONDS = float(os.getenv("RESIZE_MIN_SECONDS", "120"))
+INGEST_CONTROL_SECONDS = float(os.getenv("INGEST_CONTROL_SECONDS", "10"))
+
+# How late an event may arrive behind the newest one of its topic before it is dropped,
+# overridable per topic with WATERMARK_DELAY_<TOPIC>, and how far apart in event time an
+# order and its customer, inventory, payment and shipment events may be to join. Join
+# state is kept for about JOIN_WINDOW plus the watermark delay, then evicted.
+WATERMARK_DELAY = os.getenv("WATERMARK_DELAY", "30 minutes")
+JOIN_WINDOW = os.getenv("JOIN_WINDOW", "15 minutes")
+
+# State store provider of the joins and aggregations: 'hdfs' (Spark's default, state on the
+# JVM heap) or 'rocksdb'. ROCKSDB_MAX_MEMORY_MB caps RocksDB's memory per executor (Spark 3.5+).
+# Per-operator state metrics are appended as JSON lines to STATE_METRICS_FILE when it is set.
+STATE_STORE = os.getenv("STATE_STORE", "hdfs")
+ROCKSDB_MAX_MEMORY_MB = os.getenv("ROCKSDB_MAX_MEMORY_MB")
+STATE_METRICS_FILE = os.getenv("STATE_METRICS_FILE")
+
+# Sliding windows over inventory_eventTime as 'length/slide' pairs, a length without a slide
+# advancing every WINDOW_SLIDE. Every item lands in length / slide windows, so long windows slide
+# coarsely: the defaults put an item in 5 + 12 + 24 windows rather than the 1505 of a one
+# minute slide for all three. A window's rows expire from WINDOWS_TABLE WINDOW_TTL_SECONDS
+# after their last write.
+WINDOWS_TABLE = os.getenv("WINDOWS_TABLE", "product_windows")
+WINDOW_SLIDE = os.getenv("WINDOW_SLIDE", "1 minute")
+SLIDING_WINDOWS = [
+    (entry.split("/")[0].strip(), entry.split("/")[1].strip() if "/" in entry else WINDOW_SLIDE)
+    for entry in os.getenv("SLIDING_WINDOWS", "5 minutes/1 minute,1 hour/5 minutes,24 hours/1 hour").split(",")
+]
+WINDOW_TTL_SECONDS = int(os.getenv("WINDOW_TTL_SECONDS", "172800"))
+
+# Source of an order's country in topics mode: 'stream' joins the customer_created topic,
+# 'mysql' and 'snapshot' join a customerId -> country dimension loaded from user_management
+# over JDBC or from the Parquet files at CUSTOMER_SNAPSHOT_PATH, broadcast to every task and
+# reloaded every CUSTOMER_DIMENSION_REFRESH_SECONDS, when the source query is restarted to join it.
+# Orders of customers missing from the loaded dimension are counted under UNKNOWN_COUNTRY.
+CUSTOMER_DIMENSION = os.getenv("CUSTOMER_DIMENSION", "stream")
+if CUSTOMER_DIMENSION not in ("stream", "mysql", "snapshot"):
+    raise ValueError(f"unknown CUSTOMER_DIMENSION: {CUSTOMER_DIMENSION}")
+UNKNOWN_COUNTRY = os.getenv("UNKNOWN_COUNTRY", "Unknown")
+CUSTOMER_SNAPSHOT_PATH = os.getenv("CUSTOMER_SNAPSHOT_PATH")
+CUSTOMER_DIMENSION_REFRESH_SECONDS = float(os.getenv("CUSTOMER_DIMENSION_REFRESH_SECONDS", "3600"))
+MYSQL_JDBC_URL = os.getenv("MYSQL_JDBC_URL", "jdbc:mysql://HOST:3306/user_management")
+
+# Products kept in the ranking of each country, per metric
+TOP_K_QUANTITY = int(os.getenv("TOP_K_QUANTITY", os.getenv("TOP_K", "10")))
+TOP_K_AMOUNT = int(os.getenv("TOP_K_AMOUNT", os.getenv("TOP_K", "10")))
+
+# 'exact' ranks from running totals of every (country, product, material), 'approximate' keeps
+# a Space-Saving summary per country and metric instead (see heavy_hitters.py), whose estimates
+# overcount by at most HEAVY_HITTER_EPSILON of the country's total, with at most
+# HEAVY_HITTER_MAX_COUNTERS counters per summary whatever the catalog size
+TOP_K_MODE = os.getenv("TOP_K_MODE", "exact")
+HEAVY_HITTER_EPSILON = float(os.getenv("HEAVY_HITTER_EPSILON", "0.0001"))
+HEAVY_HITTER_MAX_COUNTERS = int(os.getenv("HEAVY_HITTER_MAX_COUNTERS", "10000"))
 
 # Initialize Spark session with tuned configurations.
 spark = SparkSession.builder \
@@ -15,6 +113,21 @@ spark.conf.set("spark.cassandra.connection.host", "HOST")
 spark.conf.set("spark.cassandra.auth.username", "USERNAME")
 spark.conf.set("spark.cassandra.auth.password", "USERPASSWORD")
 
+# The executors import the Space-Saving summary of the approximate top-K from this file
+if TOP_K_MODE == "approximate":
+    spark.sparkContext.addPyFile(os.path.join(os.path.dirname(os.path.abspath(__file__)), "heavy_hitters.py"))
+
+# RocksDB keeps the join and aggregation state off the JVM heap, on executor local disk with
+# a bounded block cache, and with changelog checkpointing (Spark 3.4+) only the changed state
+# rows are uploaded each epoch instead of full snapshots. Only new checkpoints can switch provider.
+if STATE_STORE == "rocksdb":
+    spark.conf.set("spark.sql.streaming.stateStore.providerClass",
+                   "org.apache.spark.sql.execution.streaming.state.RocksDBStateStoreProvider")
+    spark.conf.set("spark.sql.streaming.stateStore.rocksdb.changelogCheckpointing.enabled", "true")
+    if ROCKSDB_MAX_MEMORY_MB:
+        spark.conf.set("spark.sql.streaming.stateStore.rocksdb.boundedMemoryUsage", "true")
+        spark.conf.set("spark.sql.streaming.stateStore.rocksdb.maxMemoryUsageMB", ROCKSDB_MAX_MEMORY_MB)
+
 # Define schemas
 customer_schema = StructType([
     StructField("orderId", StringType(), True),
@@ -42,6 +155,7 @@ inventory_schema = StructType([
 
 order_schema = StructType([
     StructField("orderId", StringType(), True),
+    StructField("customerId", StringType(), True),
     StructField("orderStatus", StringType(), True),
     StructField("orderSummary", StructType([
         StructField("itemsSubtotal", StringType(), True),
@@ -77,184 +191,655 @@ shipment_schema = StructType([
     StructField("eventTime", TimestampType(), True)
 ])
 
-# Read from Kafka
-kafka_df = spark.readStream.format("kafka") \
-    .option("kafka.bootstrap.servers", "HOST:PORT") \
-    .option("subscribe", "customer_created,inventory_created,payment_created,order_created,shipment_created") \
-    .option("startingOffsets", "earliest") \
-    .option("maxOffsetsPerTrigger", 100) \
-    .load()
-
-# Cast Kafka data to strings
-parsed_df = kafka_df.selectExpr("CAST(key AS STRING)", "CAST(value AS STRING)")
-
-# Parse and flatten each topic
-customer_df = parsed_df.filter("key = 'customer'") \
-    .select(from_json(col("value"), customer_schema).alias("customer")) \
-    .select(
-        col("customer.orderId"),
-        col("customer.address").alias("country"),
-        col("customer.eventTime").alias("customer_eventTime")
-    )
+order_event_schema = StructType([
+    StructField("orderId", StringType(), True),
+    StructField("customerId", StringType(), True),
+    StructField("country", StringType(), True),
+    StructField("itemsOrdered", inventory_schema["itemsOrdered"].dataType, True),
+    StructField("orderStatus", StringType(), True),
+    StructField("orderSummary", order_schema["orderSummary"].dataType),
+    StructField("created_at", TimestampType(), True),
+    StructField("transactionId", StringType(), True),
+    StructField("amount", StringType(), True),
+    StructField("paymentStatus", StringType(), True),
+    StructField("trackerId", StringType(), True),
+    StructField("shippingStatus", StringType(), True),
+    StructField("eventTime", TimestampType(), True)
+])
 
-inventory_df = parsed_df.filter("key = 'inventory'") \
-    .select(from_json(col("value"), inventory_schema).alias("inventory")) \
-    .select(
-        col("inventory.orderId"),
-        explode(col("inventory.itemsOrdered")).alias("item"),
-        col("inventory.eventTime").alias("inventory_eventTime")
-    ) \
-    .select(
-        col("orderId"),
-        col("item.product"),
-        col("item.material"),
-        col("item.soldBy"),
-        col("item.quantity"),
-        regexp_replace(
-            regexp_replace(col("item.totalPrice"), "[^0-9.]", ""), ",", ""
-        ).cast("double").alias("amount"),
-        col("inventory_eventTime")
-    )
+sales_schema = StructType([
+    StructField("orderId", StringType(), True),
+    StructField("country", StringType(), True),
+    StructField("product", StringType(), True),
+    StructField("material", StringType(), True),
+    StructField("quantity", IntegerType(), True),
+    StructField("amount", DoubleType(), True),
+    StructField("inventory_eventTime", TimestampType(), True)
+])
 
-order_df = parsed_df.filter("key = 'order'") \
-    .select(from_json(col("value"), order_schema).alias("order")) \
-    .filter(col("order.orderStatus") == "Confirmed") \
-    .select(
-        col("order.orderId"),
-        col("order.orderStatus"),
-        col("order.orderSummary"),
-        col("order.created_at"),
-        col("order.eventTime").alias("order_eventTime")
-    ) \
-    .withWatermark("order_eventTime", "30 minutes")
-
-payment_df = parsed_df.filter("key = 'payment'") \
-    .select(from_json(col("value"), payment_schema).alias("payment")) \
-    .filter(col("payment.paymentStatus") == "paid") \
-    .select(
-        col("payment.orderId"),
-        col("payment.transactionId"),
-        col("payment.amount"),
-        col("payment.eventTime").alias("payment_eventTime")
-    )
+def decode_value(topic, json_schema):
+    """
+    Decodes the Kafka value of a topic into a struct, natively from Avro binary or from JSON text.
+    """
+    if EVENT_ENCODING == "avro":
+        with open(os.path.join(AVRO_SCHEMA_DIR, f"{topic}.avsc")) as f:
+            return from_avro(col("value"), f.read())
+    return from_json(col("value").cast("string"), json_schema)
 
-shipment_df = parsed_df.filter("key = 'shipment'") \
-    .select(from_json(col("value"), shipment_schema).alias("shipment")) \
-    .filter(col("shipment.shippingStatus") == "Delivered") \
-    .select(
-        col("shipment.orderId"),
-        col("shipment.trackerId"),
-        col("shipment.deliveryTo"),
-        col("shipment.updated_at"),
-        col("shipment.eventTime").alias("shipment_eventTime")
-    )
+def topic_setting(name, topic, default=None):
+    return os.getenv(f"{name}_{topic.upper()}", default)
+
+def read_topic(topic, max_offsets):
+    """
+    Reads the values of one order topic as its own Kafka source.
+
+    Every topic gets its own offset limit, starting offsets and Spark partitions
+    (one per Kafka partition, or MIN_PARTITIONS_<TOPIC>). A busy topic therefore
+    neither starves nor waits for the others, and each record is decoded only
+    by its own topic's schema. MAX_OFFSETS_PER_TRIGGER_<TOPIC> pins a topic's
+    limit, the others follow max_offsets. read_committed skips records of
+    aborted or still open producer transactions.
+    """
+    reader = spark.readStream.format("kafka") \
+        .option("kafka.bootstrap.servers", KAFKA_BOOTSTRAP_SERVERS) \
+        .option("subscribe", topic) \
+        .option("kafka.isolation.level", "read_committed") \
+        .option("startingOffsets", topic_setting("STARTING_OFFSETS", topic, STARTING_OFFSETS)) \
+        .option("maxOffsetsPerTrigger", int(topic_setting("MAX_OFFSETS_PER_TRIGGER", topic, max_offsets)))
+    if topic_setting("MIN_PARTITIONS", topic):
+        reader = reader.option("minPartitions", int(topic_setting("MIN_PARTITIONS", topic)))
+    return reader.load().select("value")  # values stay binary until decode_value
+
+def lateness(topic):
+    return topic_setting("WATERMARK_DELAY", topic, WATERMARK_DELAY)
+
+def within_join_window(alias, event_time):
+    """
+    Join condition on the order id, with the event at most JOIN_WINDOW before or after the order.
+    """
+    return expr(f"o.orderId = {alias}.orderId AND o.order_eventTime BETWEEN "
+                f"{alias}.{event_time} - interval {JOIN_WINDOW} AND {alias}.{event_time} + interval {JOIN_WINDOW}")
+
+class CustomerDimension:
+    """
+    customerId -> country lookup of the stream-static customer join.
+
+    'mysql' reads the country of each customer's first address from
+    user_management over JDBC (the MySQL Connector/J jar must be on the
+    classpath), 'snapshot' reads Parquet files with customerId and country
+    columns. The table is cached, so every micro-batch joins the same copy.
+
+    A streaming query keeps the plan of the DataFrame it was started with, so
+    the dimension is refreshed by restarting the source query. maybe_refresh()
+    reads the source again every refresh_seconds, listing the snapshot files
+    anew, caches the new table and returns True. The driver then restarts the
+    source query, and only the micro-batches of the restarted query join the
+    new customers. Batches in between keep joining the previous copy, and an
+    order whose customer is not in the copy it joins is counted under
+    UNKNOWN_COUNTRY rather than dropped.
+    """
+
+    def __init__(self, source, refresh_seconds):
+        self.source = source
+        self.refresh_seconds = refresh_seconds
+        self.df = self.load().cache()
+        self.rows = self.df.count()
+        self.loaded_at = time.monotonic()
+
+    def load(self):
+        if self.source == "snapshot":
+            df = spark.read.parquet(CUSTOMER_SNAPSHOT_PATH)
+        else:
+            df = spark.read.format("jdbc") \
+                .option("url", MYSQL_JDBC_URL) \
+                .option("user", os.getenv("MYSQL_USER")) \
+                .option("password", os.getenv("MYSQL_PASSWORD")) \
+                .option("query", """
+                    SELECT address.customer_id AS customerId, country.name AS country
+                    FROM address
+                    INNER JOIN street ON address.street_id = street.id
+                    INNER JOIN postalcode ON street.postalcode_id = postalcode.id
+                    INNER JOIN city ON postalcode.city_id = city.id
+                    INNER JOIN state ON city.state_id = state.id
+                    INNER JOIN country ON state.country_id = country.id
+                    WHERE address.id IN (SELECT MIN(id) FROM address GROUP BY customer_id)
+                """) \
+                .load()
+        return df.select(col("customerId").cast("string").alias("customerId"), col("country"))
+
+    def maybe_refresh(self):
+        if time.monotonic() - self.loaded_at < self.refresh_seconds:
+            return False
+        previous = self.df
+        self.df = self.load().cache()
+        self.rows = self.df.count()
+        self.loaded_at = time.monotonic()
+        previous.unpersist()  # the caller restarts the source query, which stops using it
+        print(f"[dimension] reloaded {self.rows} customers from {self.source}")
+        return True
 
-# Join all streams
-joined_df = order_df.alias("o") \
-    .join(
-        payment_df.alias("p"), 
-        expr("o.orderId = p.orderId AND o.order_eventTime BETWEEN p.payment_eventTime - interval 15 minutes AND p.payment_eventTime + interval 15 minutes")
-    ) \
-    .join(
-        shipment_df.alias("s"),
-        expr("o.orderId = s.orderId AND o.order_eventTime BETWEEN s.shipment_eventTime - interval 15 minutes AND s.shipment_eventTime + interval 15 minutes")
-    ) \
-    .join(
-        inventory_df.alias("i"),
-        expr("o.orderId = i.orderId")
-    ) \
-    .join(
-        customer_df.alias("c"),
-        expr("o.orderId = c.orderId AND o.order_eventTime BETWEEN c.customer_eventTime - interval 15 minutes AND c.customer_eventTime + interval 15 minutes")
+def order_items(max_offsets):
+    """
+    Returns the confirmed, paid and delivered order items read from the order
+    topics, one row per (orderId, country, product, material, quantity, amount,
+    inventory_eventTime).
+    """
+    # Envelope mode: the same order items, read from one record per order
+    if ORDER_TOPIC_MODE == "envelope":
+        return read_topic("order_event", max_offsets) \
+            .select(decode_value("order_event", order_event_schema).alias("event")) \
+            .filter(
+                (col("event.orderStatus") == "Confirmed") &
+                (col("event.paymentStatus") == "paid") &
+                (col("event.shippingStatus") == "Delivered")
+            ) \
+            .select(
+                col("event.orderId"),
+                col("event.country"),
+                explode(col("event.itemsOrdered")).alias("item"),
+                col("event.eventTime").alias("inventory_eventTime")
+            ) \
+            .select(
+                col("orderId"),
+                col("country"),
+                col("item.product"),
+                col("item.material"),
+                col("item.quantity"),
+                regexp_replace(
+                    regexp_replace(col("item.totalPrice"), "[^0-9.]", ""), ",", ""
+                ).cast("double").alias("amount"),
+                col("inventory_eventTime")
+            )
+
+    # Parse and flatten each topic
+    customer_df = read_topic("customer_created", max_offsets) \
+        .select(decode_value("customer_created", customer_schema).alias("customer")) \
+        .select(
+            col("customer.orderId"),
+            col("customer.address").alias("country"),
+            col("customer.eventTime").alias("customer_eventTime")
+        ) \
+        .withWatermark("customer_eventTime", lateness("customer_created"))
+
+    inventory_df = read_topic("inventory_created", max_offsets) \
+        .select(decode_value("inventory_created", inventory_schema).alias("inventory")) \
+        .select(
+            col("inventory.orderId"),
+            explode(col("inventory.itemsOrdered")).alias("item"),
+            col("inventory.eventTime").alias("inventory_eventTime")
+        ) \
+        .select(
+            col("orderId"),
+            col("item.product"),
+            col("item.material"),
+            col("item.soldBy"),
+            col("item.quantity"),
+            regexp_replace(
+                regexp_replace(col("item.totalPrice"), "[^0-9.]", ""), ",", ""
+            ).cast("double").alias("amount"),
+            col("inventory_eventTime")
+        ) \
+        .withWatermark("inventory_eventTime", lateness("inventory_created"))
+
+    order_df = read_topic("order_created", max_offsets) \
+        .select(decode_value("order_created", order_schema).alias("order")) \
+        .filter(col("order.orderStatus") == "Confirmed") \
+        .select(
+            col("order.orderId"),
+            col("order.customerId").cast("string").alias("customerId"),  # a long when read from Avro
+            col("order.orderStatus"),
+            col("order.orderSummary"),
+            col("order.created_at"),
+            col("order.eventTime").alias("order_eventTime")
+        ) \
+        .withWatermark("order_eventTime", lateness("order_created"))
+
+    payment_df = read_topic("payment_created", max_offsets) \
+        .select(decode_value("payment_created", payment_schema).alias("payment")) \
+        .filter(col("payment.paymentStatus") == "paid") \
+        .select(
+            col("payment.orderId"),
+            col("payment.transactionId"),
+            col("payment.amount"),
+            col("payment.eventTime").alias("payment_eventTime")
+        ) \
+        .withWatermark("payment_eventTime", lateness("payment_created"))
+
+    shipment_df = read_topic("shipment_created", max_offsets) \
+        .select(decode_value("shipment_created", shipment_schema).alias("shipment")) \
+        .filter(col("shipment.shippingStatus") == "Delivered") \
+        .select(
+            col("shipment.orderId"),
+            col("shipment.trackerId"),
+            col("shipment.deliveryTo"),
+            col("shipment.updated_at"),
+            col("shipment.eventTime").alias("shipment_eventTime")
+        ) \
+        .withWatermark("shipment_eventTime", lateness("shipment_created"))
+
+    # Join all streams. Every join is bounded in event time, so once the watermark of
+    # both sides passes the bound a buffered row can no longer match and leaves the state.
+    joined_df = order_df.alias("o") \
+        .join(payment_df.alias("p"), within_join_window("p", "payment_eventTime")) \
+        .join(shipment_df.alias("s"), within_join_window("s", "shipment_eventTime")) \
+        .join(inventory_df.alias("i"), within_join_window("i", "inventory_eventTime"))
+    if CUSTOMER_DIMENSION == "stream":
+        joined_df = joined_df.join(customer_df.alias("c"), within_join_window("c", "customer_eventTime"))
+    else:
+        # Stream-static join: the country comes from the broadcast dimension, so customer_df
+        # never becomes a source and no customer events are buffered in join state. It is a
+        # left join, so customers registered after the last load keep their orders as UNKNOWN_COUNTRY
+        joined_df = joined_df.join(broadcast(customer_dimension.df).alias("c"), expr("o.customerId = c.customerId"), "left")
+    return joined_df.select(
+        col("o.orderId"), coalesce(col("c.country"), lit(UNKNOWN_COUNTRY)).alias("country"), col("i.product"), col("i.material"),
+        col("i.quantity"), col("i.amount"), col("i.inventory_eventTime")
     )
-# Process each micro-batch of data
+
+def read_cassandra(table):
+    return spark.read \
+        .format("org.apache.spark.sql.cassandra") \
+        .options(table=table, keyspace=CASSANDRA_KEYSPACE) \
+        .load()
+
+def write_cassandra(df, table, ttl=None):
+    # Cassandra writes are upserts on the table's primary key, so a replayed epoch rewrites the same rows
+    writer = df.write \
+        .format("org.apache.spark.sql.cassandra") \
+        .mode("append") \
+        .options(table=table, keyspace=CASSANDRA_KEYSPACE)
+    if ttl:
+        writer = writer.option("spark.cassandra.output.ttl", ttl)
+    writer.save()
+
+def top_k(batch_df, countries, metric, table, k):
+    """
+    Returns the new top-k rows by metric of the given countries.
+
+    Totals only grow, so a product outside a country's previous top-k that did
+    not change in this epoch cannot enter it. The candidates are therefore the
+    stored top-k rows of the touched countries plus the changed keys, and
+    neither the full totals table nor untouched countries are read.
+    """
+    stored = read_cassandra(table) \
+        .filter(col("country").isin(countries)) \
+        .select("country", "product", "material", metric)
+    candidates = stored.join(batch_df, ["country", "product", "material"], "left_anti") \
+        .unionByName(batch_df.select("country", "product", "material", metric))
+    rank_window = Window.partitionBy("country").orderBy(desc(metric))
+    return candidates.withColumn("rank", row_number().over(rank_window)) \
+        .filter(col("rank") <= k) \
+        .withColumn("timestamp", current_timestamp())
+
+# Each micro-batch holds only the keys whose totals changed in this epoch, with their new totals
 def process_batch(batch_df, epoch_id):
     if not batch_df.rdd.isEmpty():
-        batch_timestamp = current_timestamp()
+        batch_df = batch_df.withColumn("updated_at", current_timestamp()).persist()
 
-        # Aggregate current batch
-        batch_agg_df = batch_df.groupBy("c.country", "i.product", "i.material") \
-            .agg(
-                sum("i.quantity").alias("batch_quantity"),
-                sum("i.amount").alias("batch_amount")
-            )
+        # Upsert the changed totals, one row per distinct key of the batch
+        write_cassandra(batch_df, TOTALS_TABLE)
 
-        # Load existing quantity data
-        existing_quantity_df = spark.read \
-            .format("org.apache.spark.sql.cassandra") \
-            .options(table="YOURTABLENAME", keyspace="YOURKEYSPACE") \
-            .load()
-
-        # Load existing amount data
-        existing_amount_df = spark.read \
-            .format("org.apache.spark.sql.cassandra") \
-            .options(table="YOURTABLENAME", keyspace="YOURKEYSPACE") \
-            .load()
-
-        # Merge cumulative quantity
-        cumulative_qty = batch_agg_df.alias("new").join(
-            existing_quantity_df.alias("old"),
-            on=[
-                col("new.country") == col("old.country"),
-                col("new.product") == col("old.product"),
-                col("new.material") == col("old.material")
-            ],
-            how="outer"
-        ).select(
-            coalesce(col("new.country"), col("old.country")).alias("country"),
-            coalesce(col("new.product"), col("old.product")).alias("product"),
-            coalesce(col("new.material"), col("old.material")).alias("material"),
-            (coalesce(col("new.batch_quantity"), lit(0)) + coalesce(col("old.total_quantity"), lit(0))).alias("total_quantity")
-        )
+        # Re-rank only the countries that received events in this epoch. Ranks are keyed
+        # by (country, rank), so ranks 1..k of those countries are overwritten in place.
+        countries = [row.country for row in batch_df.select("country").distinct().collect()]
+        write_cassandra(top_k(batch_df, countries, "total_quantity", QUANTITY_RANK_TABLE, TOP_K_QUANTITY), QUANTITY_RANK_TABLE)
+        write_cassandra(top_k(batch_df, countries, "total_amount", AMOUNT_RANK_TABLE, TOP_K_AMOUNT), AMOUNT_RANK_TABLE)
+        batch_df.unpersist()
+
+def read_sales():
+    """
+    Reads the joined order items back from SALES_TOPIC.
+
+    The Kafka sink of the join query is at-least-once: a micro-batch
+    interrupted by a restart of the source query is written again when it is
+    replayed. Identical items are dropped here, so the totals and windows
+    count each one once. The event time is part of the key and the watermark
+    evicts the kept keys WATERMARK_DELAY after it.
+    """
+    return spark.readStream.format("kafka") \
+        .option("kafka.bootstrap.servers", KAFKA_BOOTSTRAP_SERVERS) \
+        .option("subscribe", SALES_TOPIC) \
+        .option("startingOffsets", "earliest") \
+        .load() \
+        .select(from_json(col("value").cast("string"), sales_schema).alias("sale")) \
+        .select("sale.*") \
+        .withWatermark("inventory_eventTime", WATERMARK_DELAY) \
+        .dropDuplicates(sales_schema.fieldNames())
+
+def approximate_top_k(key, batches, state):
+    """
+    Adds the order items of one country in this epoch to its Space-Saving
+    summaries of quantity and amount, kept as JSON in the group state, and
+    returns the country's new top-k of both. Each row carries its estimate's
+    largest possible overcount as max_error.
+    """
+    import pandas as pd
+    from heavy_hitters import SpaceSaving
+
+    if state.exists:
+        summaries = {metric: SpaceSaving.from_state(summary) for metric, summary in json.loads(state.get[0]).items()}
+    else:
+        summaries = {metric: SpaceSaving.for_error(HEAVY_HITTER_EPSILON, HEAVY_HITTER_MAX_COUNTERS)
+                     for metric in ("quantity", "amount")}
+    for pdf in batches:
+        items = pdf.fillna({"quantity": 0, "amount": 0.0}) \
+            .groupby(["product", "material"], as_index=False)[["quantity", "amount"]].sum()
+        for product, material, quantity, amount in items.itertuples(index=False):
+            summaries["quantity"].add((product, material), int(quantity))
+            summaries["amount"].add((product, material), float(amount))
+    state.update((json.dumps({metric: summary.to_state() for metric, summary in summaries.items()}),))
+
+    yield pd.DataFrame([
+        (key[0], metric, rank, product, material, float(estimate), float(error))
+        for metric, k in (("quantity", TOP_K_QUANTITY), ("amount", TOP_K_AMOUNT))
+        for rank, ((product, material), estimate, error) in enumerate(summaries[metric].top(k), 1)
+    ], columns=["country", "metric", "rank", "product", "material", "total", "max_error"])
+
+def write_approximate_ranks(batch_df, epoch_id):
+    # One row per rank of each country that received order items in this epoch
+    batch_df = batch_df.withColumn("timestamp", current_timestamp()).persist()
+    for metric, column, table in (("quantity", "total_quantity", QUANTITY_RANK_TABLE), ("amount", "total_amount", AMOUNT_RANK_TABLE)):
+        write_cassandra(batch_df.filter(col("metric") == metric).select(
+            "country", "rank", "product", "material",
+            col("total").cast("long" if metric == "quantity" else "double").alias(column),
+            "max_error", "timestamp"
+        ), table)
+    batch_df.unpersist()
+
+def start_approximate_top_k_query(sales_df, trigger):
+    """
+    Approximate top-k per country (Spark 3.4+). The state holds two bounded
+    summaries per country instead of a running total per product, so it stays
+    the same size however many products are sold. TOTALS_TABLE is not written
+    in this mode.
+    """
+    from pyspark.sql.streaming.state import GroupStateTimeout
+    return sales_df.groupBy("country") \
+        .applyInPandasWithState(
+            approximate_top_k,
+            "country string, metric string, rank int, product string, material string, total double, max_error double",
+            "summaries string",
+            "update",
+            GroupStateTimeout.NoTimeout
+        ) \
+        .writeStream \
+        .outputMode("update") \
+        .foreachBatch(write_approximate_ranks) \
+        .option("checkpointLocation", f"{CHECKPOINT_ROOT}/approximate_top_k" + ("_envelope" if ORDER_TOPIC_MODE == "envelope" else "")) \
+        .trigger(**trigger) \
+        .start()
 
-        # Merge cumulative amount
-        cumulative_amt = batch_agg_df.alias("new").join(
-            existing_amount_df.alias("old"),
-            on=[
-                col("new.country") == col("old.country"),
-                col("new.product") == col("old.product"),
-                col("new.material") == col("old.material")
-            ],
-            how="outer"
-        ).select(
-            coalesce(col("new.country"), col("old.country")).alias("country"),
-            coalesce(col("new.product"), col("old.product")).alias("product"),
-            coalesce(col("new.material"), col("old.material")).alias("material"),
-            (coalesce(col("new.batch_amount"), lit(0.0)) + coalesce(col("old.total_amount"), lit(0.0))).alias("total_amount")
+def start_totals_query(sales_df, trigger):
+    """
+    Running totals per (country, product, material), kept in Spark's state store
+    and updated only with the new order items of each micro-batch. Update mode
+    hands only the keys changed in the epoch to process_batch, with their
+    running totals from state. With TOP_K_MODE=approximate the rankings come
+    from start_approximate_top_k_query instead.
+    """
+    if TOP_K_MODE == "approximate":
+        return start_approximate_top_k_query(sales_df, trigger)
+    totals_df = sales_df.groupBy("country", "product", "material") \
+        .agg(
+            sum("quantity").alias("total_quantity"),
+            sum("amount").alias("total_amount")
         )
+    return totals_df.writeStream \
+        .outputMode("update") \
+        .foreachBatch(process_batch) \
+        .option("checkpointLocation", f"{CHECKPOINT_ROOT}/product_totals" + ("_envelope" if ORDER_TOPIC_MODE == "envelope" else "")) \
+        .trigger(**trigger) \
+        .start()
+
+def write_windows(batch_df, epoch_id):
+    # Only the windows whose totals changed in this epoch, each row refreshing its TTL
+    write_cassandra(batch_df.withColumn("updated_at", current_timestamp()), WINDOWS_TABLE, WINDOW_TTL_SECONDS)
+
+def start_windows_query(sales_df, trigger):
+    """
+    Totals per (country, product, material) in sliding windows of every
+    SLIDING_WINDOWS length over inventory_eventTime, each sliding by its own slide.
+
+    Each order item is assigned to every window that contains it and the sums
+    are kept per window in Spark's state, so an epoch only adds its new items.
+    Update mode writes the windows that changed. The watermark on the input,
+    WATERMARK_DELAY behind the newest item, closes a window after its end, which
+    evicts its state. A window of length L sliding by S holds every item in
+    L / S windows, so state and writes grow with that ratio, which is why the
+    long windows slide coarsely.
+    """
+    windowed_df = reduce(DataFrame.unionByName, [
+        sales_df.select(
+            col("country"), col("product"), col("material"), col("quantity"), col("amount"),
+            lit(length).alias("window_length"),
+            window(col("inventory_eventTime"), length, slide).alias("window")
+        ) for length, slide in SLIDING_WINDOWS
+    ])
+    return windowed_df.groupBy("country", "window_length", "window", "product", "material") \
+        .agg(
+            sum("quantity").alias("total_quantity"),
+            sum("amount").alias("total_amount")
+        ) \
+        .select(
+            "country", "window_length",
+            col("window.start").alias("window_start"), col("window.end").alias("window_end"),
+            "product", "material", "total_quantity", "total_amount"
+        ) \
+        .writeStream \
+        .outputMode("update") \
+        .foreachBatch(write_windows) \
+        .option("checkpointLocation", f"{CHECKPOINT_ROOT}/product_windows" + ("_envelope" if ORDER_TOPIC_MODE == "envelope" else "")) \
+        .trigger(**trigger) \
+        .start()
+
+def window_input():
+    """
+    Order items of the windows query, watermarked on inventory_eventTime: the
+    join query's output in topics mode, a read of its own of the order_event
+    topic in envelope mode.
+    """
+    if ORDER_TOPIC_MODE == "envelope":
+        return order_items(MAX_OFFSETS_PER_TRIGGER).withWatermark("inventory_eventTime", WATERMARK_DELAY)
+    return read_sales()
+
+def start_source_query(max_offsets, trigger):
+    """
+    Starts the query that reads the order topics, each Kafka source limited
+    to max_offsets offsets per micro-batch.
+
+    Stream-stream joins only run in append mode, while running totals need update
+    or complete mode. In topics mode this is the join query, which publishes the
+    joined order items to SALES_TOPIC for the totals query to read back. Envelope
+    mode needs no join and this is the totals query itself.
+    """
+    items_df = order_items(max_offsets)
+    if ORDER_TOPIC_MODE == "envelope":
+        return start_totals_query(items_df, trigger)
+    return items_df.select(
+        col("orderId").alias("key"),
+        to_json(struct(*items_df.columns)).alias("value")
+    ).writeStream \
+        .format("kafka") \
+        .option("kafka.bootstrap.servers", KAFKA_BOOTSTRAP_SERVERS) \
+        .option("topic", SALES_TOPIC) \
+        .option("checkpointLocation", f"{CHECKPOINT_ROOT}/order_sales") \
+        .trigger(**trigger) \
+        .start()
+
+def offsets_behind(progress):
+    """
+    Returns how many offsets each Kafka source (one per topic) of a progress
+    report was behind the latest offsets when the batch was planned, None when
+    Spark did not report them.
+    """
+    behind = {}
+    for source in progress["sources"]:
+        latest, end = source.get("latestOffset"), source.get("endOffset")
+        if not latest or not end:
+            return None
+        latest, end = (json.loads(offsets) if isinstance(offsets, str) else offsets for offsets in (latest, end))
+        for topic, partitions in latest.items():
+            behind[topic] = sum(max(0, offset - end.get(topic, {}).get(partition, offset))
+                                for partition, offset in partitions.items())
+    return behind
+
+class IngestionController:
+    """
+    Sizes maxOffsetsPerTrigger of the Kafka source from the progress of the
+    query that reads it.
+
+    Every topic is its own source with its own limit, so the controller sizes
+    for the busiest one: its rows per second of trigger execution tell how many
+    offsets per topic fit in target_seconds. The limit shrinks to that when a batch
+    ran longer than target_seconds, grows to it while the source is more than
+    one batch behind, and always stays within min_offsets and max_offsets.
+
+    The Kafka source reads maxOffsetsPerTrigger only when a query starts, so a
+    new limit takes a restart of the source query from its checkpoint. Restarts
+    only happen when the limit moved by at least resize_ratio and the last one
+    is min_restart_seconds ago, so they stay rare.
+    """
+
+    def __init__(self, limit, min_offsets, max_offsets, target_seconds, resize_ratio=1.5, min_restart_seconds=120):
+        self.min_offsets = min_offsets
+        self.max_offsets = max_offsets
+        self.target_seconds = target_seconds
+        self.resize_ratio = resize_ratio
+        self.min_restart_seconds = min_restart_seconds
+        self.limit = self.clamp(limit)
+        self.proposed = self.limit
+        self.last_batch = -1
+        self.restarted_at = time.monotonic()
+
+    def clamp(self, offsets):
+        return int(max(self.min_offsets, min(self.max_offsets, offsets)))
+
+    def observe(self, query):
+        """
+        Logs every epoch of the query not seen yet and updates the proposed limit.
+        """
+        for progress in query.recentProgress:
+            if progress["batchId"] <= self.last_batch or not progress["sources"]:
+                continue
+            self.last_batch = progress["batchId"]
+            rows = max(source["numInputRows"] for source in progress["sources"])
+            seconds = progress["durationMs"].get("triggerExecution", 0) / 1000
+            lag = offsets_behind(progress)
+            behind = max(lag.values(), default=0) if lag is not None else None
+            decision = "keep"
+            if rows and seconds:
+                fits = self.clamp(rows / seconds * self.target_seconds)
+                if seconds > self.target_seconds and fits < self.proposed:
+                    self.proposed, decision = fits, "shrink"
+                elif behind is not None and behind > self.proposed and fits > self.proposed:
+                    self.proposed, decision = fits, "grow"
+            print(f"[ingestion] {query.name or query.id} epoch={self.last_batch} rows={progress['numInputRows']} "
+                  f"busiestTopicRows={rows} seconds={seconds:.1f} rowsPerSecond={rows / seconds if seconds else 0:.0f} "
+                  f"offsetsBehind={lag} limit={self.limit} proposed={self.proposed} decision={decision}")
+
+    def resize_due(self):
+        ratio = max(self.proposed, self.limit) / min(self.proposed, self.limit)
+        return ratio >= self.resize_ratio and time.monotonic() - self.restarted_at >= self.min_restart_seconds
+
+    def resized(self):
+        self.limit = self.proposed
+        self.restarted_at = time.monotonic()
+
+class StateMonitor:
+    """
+    Collects the state store metrics of every stateful operator once per epoch
+    of each query: rows held, rows updated and removed in the epoch, memory
+    used, commit time, rows dropped for arriving behind the watermark and the
+    provider's custom metrics (e.g. RocksDB commit latencies and bytes written).
+    Each record is logged and, with a path, appended to it as a JSON line.
+    With every join bounded in event time, rows held should level off instead
+    of growing with uptime.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.last_batch = {}
+
+    def observe(self, query):
+        records = []
+        for progress in query.recentProgress:
+            if progress["batchId"] <= self.last_batch.get(query.id, -1):
+                continue
+            self.last_batch[query.id] = progress["batchId"]
+            for index, operator in enumerate(progress.get("stateOperators", [])):
+                records.append({
+                    "timestamp": progress["timestamp"],
+                    "query": query.name or query.id,
+                    "batchId": progress["batchId"],
+                    "operator": operator.get("operatorName", index),
+                    "numRowsTotal": operator.get("numRowsTotal"),
+                    "numRowsUpdated": operator.get("numRowsUpdated"),
+                    "numRowsRemoved": operator.get("numRowsRemoved"),
+                    "memoryUsedBytes": operator.get("memoryUsedBytes"),
+                    "commitTimeMs": operator.get("commitTimeMs"),
+                    "numRowsDroppedByWatermark": operator.get("numRowsDroppedByWatermark"),
+                    "watermark": progress.get("eventTime", {}).get("watermark"),
+                    "customMetrics": operator.get("customMetrics", {})
+                })
+        for record in records:
+            print(f"[state] {record['query']} epoch={record['batchId']} operator={record['operator']} "
+                  f"rows={record['numRowsTotal']} updated={record['numRowsUpdated']} removed={record['numRowsRemoved']} "
+                  f"memoryBytes={record['memoryUsedBytes']} commitMs={record['commitTimeMs']} "
+                  f"droppedByWatermark={record['numRowsDroppedByWatermark']} watermark={record['watermark']}")
+        if self.path and records:
+            with open(self.path, "a") as f:
+                f.writelines(json.dumps(record) + "\n" for record in records)
+
+def catch_up():
+    """
+    Drains the backlog at full speed with an available-now trigger (Spark 3.3+): every offset
+    present at start is read in batches of at most ADAPTIVE_MAX_OFFSETS, then the
+    queries stop. The totals and windows queries run after the join query has
+    published all its order items.
+    """
+    controller = IngestionController(ADAPTIVE_MAX_OFFSETS, ADAPTIVE_MAX_OFFSETS, ADAPTIVE_MAX_OFFSETS, TARGET_BATCH_SECONDS)
+    queries = [lambda: start_source_query(ADAPTIVE_MAX_OFFSETS, {"availableNow": True})]
+    if ORDER_TOPIC_MODE != "envelope":
+        queries.append(lambda: start_totals_query(read_sales(), {"availableNow": True}))
+    queries.append(lambda: start_windows_query(window_input(), {"availableNow": True}))
+    for start in queries:
+        query = start()
+        while not query.awaitTermination(INGEST_CONTROL_SECONDS):
+            controller.observe(query)
+            state_monitor.observe(query)
+        controller.observe(query)
+        state_monitor.observe(query)
+        controller.last_batch = -1
+    spark.streams.resetTerminated()  # the finished queries must not end the steady-state loop below
+
+state_monitor = StateMonitor(STATE_METRICS_FILE)
+customer_dimension = CustomerDimension(CUSTOMER_DIMENSION, CUSTOMER_DIMENSION_REFRESH_SECONDS) \
+    if CUSTOMER_DIMENSION != "stream" and ORDER_TOPIC_MODE != "envelope" else None
+if INGEST_MODE == "catchup":
+    catch_up()
+
+controller = IngestionController(MAX_OFFSETS_PER_TRIGGER, ADAPTIVE_MIN_OFFSETS, ADAPTIVE_MAX_OFFSETS, TARGET_BATCH_SECONDS,
+                                 RESIZE_RATIO, RESIZE_MIN_SECONDS)
+trigger = {"processingTime": TRIGGER_INTERVAL}
+source_query = start_source_query(MAX_OFFSETS_PER_TRIGGER if INGEST_MODE == "fixed" else controller.limit, trigger)
+if ORDER_TOPIC_MODE != "envelope":
+    start_totals_query(read_sales(), trigger)
+start_windows_query(window_input(), trigger)
 
-        # Ranking by quantity
-        rank_window_qty = Window.partitionBy("country").orderBy(desc("total_quantity"))
-        ranked_qty = cumulative_qty.withColumn("rank", row_number().over(rank_window_qty)) \
-                                   .withColumn("timestamp", batch_timestamp)
-
-        # Ranking by amount
-        rank_window_amt = Window.partitionBy("country").orderBy(desc("total_amount"))
-        ranked_amt = cumulative_amt.withColumn("rank", row_number().over(rank_window_amt)) \
-                                   .withColumn("timestamp", batch_timestamp)
-
-        # Write top N by quantity
-        ranked_qty.write \
-            .format("org.apache.spark.sql.cassandra") \
-            .mode("append") \
-            .options(table="YOURTABLENAME", keyspace="YOURKEYSPACE") \
-            .option("confirm.truncate", "true") \
-            .save()
-
-        # Write top N by amount
-        ranked_amt.write \
-            .format("org.apache.spark.sql.cassandra") \
-            .mode("append") \
-            .options(table="YOURTABLENAME", keyspace="YOURKEYSPACE") \
-            .option("confirm.truncate", "true") \
-            .save()
-
-
-# Apply foreachBatch to streaming query
-query = joined_df.writeStream \
-    .foreachBatch(process_batch) \
-    .option("checkpointLocation", "hdfs://hadoop-master:9000/user/data/checkpoint_dir") \
-    .trigger(processingTime="30 seconds") \
-    .start()
-
-query.awaitTermination()
+# Log the epochs and state of the queries and restart the source query whenever the
+# customer dimension was reloaded or, in adaptive and catch-up mode, the controller resized the limit
+while not spark.streams.awaitAnyTermination(INGEST_CONTROL_SECONDS):
+    controller.observe(source_query)
+    for active_query in spark.streams.active:
+        state_monitor.observe(active_query)
+    refreshed = customer_dimension is not None and customer_dimension.maybe_refresh()
+    resize = INGEST_MODE != "fixed" and controller.resize_due()
+    if refreshed or resize:
+        if resize:
+            print(f"[ingestion] restarting {source_query.id} with maxOffsetsPerTrigger={controller.proposed}")
+        else:
+            print(f"[ingestion] restarting {source_query.id} to join the reloaded customer dimension")
+        source_query.stop()
+        spark.streams.resetTerminated()
+        if resize:
+            controller.resized()
+        source_query = start_source_query(MAX_OFFSETS_PER_TRIGGER if INGEST_MODE == "fixed" else controller.limit, trigger)
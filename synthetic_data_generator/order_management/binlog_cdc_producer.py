@@ -0,0 +1,371 @@
+from pymysqlreplication import BinLogStreamReader
+from pymysqlreplication.event import XidEvent, HeartbeatLogEvent
+from pymysqlreplication.row_event import WriteRowsEvent, UpdateRowsEvent, DeleteRowsEvent
+from confluent_kafka import Producer
+from dotenv import load_dotenv
+from datetime import datetime, timezone
+import mysql.connector
+import argparse
+import signal
+import json
+import time
+import os
+from event_encoding import get_encoder
+
+load_dotenv()
+
+USER_MANAGEMENT_DB = os.getenv('USER_MANAGEMENT_DB')
+INVENTORY_MANAGEMENT_DB = os.getenv('INVENTORY_MANAGEMENT_DB')
+ORDER_MANAGEMENT_DB = os.getenv('ORDER_MANAGEMENT_DB')
+TRANSACTION_MANAGEMENT_DB = os.getenv('TRANSACTION_MANAGEMENT_DB')
+SHIPPING_MANAGEMENT_DB = os.getenv('SHIPPING_MANAGEMENT_DB')
+
+MYSQL_SETTINGS = {
+    'host': os.getenv('MYSQL_HOST'),
+    'port': int(os.getenv('MYSQL_PORT', 3306)),
+    'user': os.getenv('MYSQL_USER'),
+    'passwd': os.getenv('MYSQL_PASSWORD')
+}
+
+# Configuration for Kafka producer
+conf = {
+    'bootstrap.servers': os.getenv('KAFKA_BOOTSTRAP_SERVERS'),
+    'client.id': 'binlog-cdc-producer',
+    'enable.idempotence': True,
+    'acks': 'all',
+    'linger.ms': 20,
+    'compression.type': 'lz4'
+}
+
+class DatabaseConnection:
+    """
+    This class handles the database connection and provides methods
+    for committing or rolling back transactions before closing the connection.
+    """
+
+    def __init__(self):
+        """
+        Initializes the database connection using credentials stored in environment variables.
+        """
+        self.conn = mysql.connector.connect(
+            host=os.getenv('MYSQL_HOST'),  # Database host (e.g., localhost or an IP address)
+            user=os.getenv('MYSQL_USER'),  # Database username
+            password=os.getenv('MYSQL_PASSWORD'),  # Database password
+            autocommit=True
+        )
+        self.cursor = self.conn.cursor()  # Create a cursor object for executing SQL queries
+
+    def commit_and_close(self):
+        """
+        Commits the transaction and closes the database connection.
+        This should be used when operations are successfully completed.
+        """
+        self.conn.commit()  # Commit any pending database changes
+        self.cursor.close()  # Close the cursor
+        self.conn.close()  # Close the database connection
+
+    def rollback_and_close(self):
+        """
+        Rolls back the transaction and closes the database connection.
+        This should be used when an error occurs and changes should not be saved.
+        """
+        self.conn.rollback()  # Rollback any uncommitted changes
+        self.cursor.close()  # Close the cursor
+        self.conn.close()  # Close the database connection
+
+class Lookups(DatabaseConnection):
+    """
+    Resolves the attributes a row event does not carry itself (product names,
+    customer country, payment type names, ...).
+
+    Small dimension tables are cached in memory and the caches are dropped
+    whenever the binlog shows a change to the underlying table.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.products = {}
+        self.payment_names = {}
+        self.trackers = {}
+
+    def invalidate(self,schema,table):
+        if schema == INVENTORY_MANAGEMENT_DB:
+            self.products.clear()
+        elif schema == TRANSACTION_MANAGEMENT_DB and table in ('payment_type','payment_method','payment_status'):
+            self.payment_names.clear()
+
+    def payment_name(self,table,column,row_id):
+        if row_id is None:
+            return None
+        key = (table,row_id)
+        if key not in self.payment_names:
+            self.cursor.execute(f'SELECT {column} FROM {TRANSACTION_MANAGEMENT_DB}.{table} WHERE id = %s',(row_id,))
+            row = self.cursor.fetchone()
+            self.payment_names[key] = row[0] if row else None
+        return self.payment_names[key]
+
+    def product(self,product_price_id):
+        if product_price_id not in self.products:
+            self.cursor.execute(f'''
+            SELECT products.name,materials.name,sellers.name
+            FROM {INVENTORY_MANAGEMENT_DB}.product_price pp
+            INNER JOIN {INVENTORY_MANAGEMENT_DB}.products products ON pp.product_id = products.id
+            INNER JOIN {INVENTORY_MANAGEMENT_DB}.materials materials ON pp.material_id = materials.id
+            INNER JOIN {INVENTORY_MANAGEMENT_DB}.sellers sellers ON pp.seller_id = sellers.id
+            WHERE pp.id = %s
+            ''',(product_price_id,))
+            self.products[product_price_id] = self.cursor.fetchone()
+        return self.products[product_price_id]
+
+    def order_items(self,order_id):
+        self.cursor.execute(f'''
+        SELECT product_price_id,quantity,total_price
+        FROM {ORDER_MANAGEMENT_DB}.order_products
+        WHERE order_id = %s
+        ''',(order_id,))
+        items = []
+        for product_price_id,quantity,total_price in self.cursor.fetchall():
+            product = self.product(product_price_id) or (None,None,None)
+            items.append({
+                'product':product[0],
+                'material':product[1],
+                'soldBy':product[2],
+                'quantity':quantity,
+                'totalPrice':str(total_price)
+            })
+        return items
+
+    def order_summary(self,order_id):
+        self.cursor.execute(f'''
+        SELECT os.items_subtotal,os.tax,os.discount,os.grand_total,co.created_at,co.customer_id
+        FROM {ORDER_MANAGEMENT_DB}.customer_order co
+        LEFT JOIN {ORDER_MANAGEMENT_DB}.order_summary os ON os.order_id = co.order_id
+        WHERE co.order_id = %s
+        ''',(order_id,))
+        return self.cursor.fetchone()
+
+    def order_customer(self,order_id):
+        self.cursor.execute(f'''
+        SELECT cb.id,cb.name,cb.mobile_number,cb.email_id,country.name
+        FROM {ORDER_MANAGEMENT_DB}.customer_order co
+        INNER JOIN {USER_MANAGEMENT_DB}.customer_bio cb ON co.customer_id = cb.id
+        INNER JOIN {USER_MANAGEMENT_DB}.address address ON address.customer_id = cb.id
+        INNER JOIN {USER_MANAGEMENT_DB}.street street ON address.street_id = street.id
+        INNER JOIN {USER_MANAGEMENT_DB}.postalcode postalcode ON street.postalcode_id = postalcode.id
+        INNER JOIN {USER_MANAGEMENT_DB}.city city ON postalcode.city_id = city.id
+        INNER JOIN {USER_MANAGEMENT_DB}.state state ON city.state_id = state.id
+        INNER JOIN {USER_MANAGEMENT_DB}.country country ON state.country_id = country.id
+        WHERE co.order_id = %s
+        LIMIT 1
+        ''',(order_id,))
+        return self.cursor.fetchone()
+
+    def tracker(self,tracker_id):
+        # Tracker to order mapping never changes, so it is cached without invalidation.
+        if tracker_id not in self.trackers:
+            self.cursor.execute(f'''
+            SELECT so.order_id,so.delivery_to
+            FROM {SHIPPING_MANAGEMENT_DB}.shipment_tracker st
+            INNER JOIN {SHIPPING_MANAGEMENT_DB}.shipment_order so ON st.shipment_id = so.id
+            WHERE st.tracker_id = %s
+            ''',(tracker_id,))
+            row = self.cursor.fetchone()
+            if row is None:
+                return None
+            if len(self.trackers) > 100000:
+                self.trackers.clear()
+            self.trackers[tracker_id] = (row[0],json.loads(row[1]))
+        return self.trackers[tracker_id]
+
+class BinlogCheckpoint:
+    """
+    Stores the last binlog position whose events were acknowledged by Kafka.
+    """
+
+    def __init__(self,path):
+        self.path = path
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path) as f:
+            return json.load(f)
+
+    def save(self,log_file,log_pos):
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path,'w') as f:
+            json.dump({'log_file':log_file,'log_pos':log_pos},f)
+        os.replace(tmp_path,self.path)  # atomic, a crash never leaves a half written checkpoint
+
+class BinlogCdcProducer:
+    """
+    Tails the MySQL binlog of the five operational schemas and turns inserted
+    rows into the topic payloads pyspark/streaming.py reads.
+
+    order_status inserts become order_created, order_summary inserts become
+    inventory_created and customer_created (the summary is the last row the
+    order service writes for a new order), payment_transaction inserts become
+    payment_created and shipment_status inserts become shipment_created.
+    The position is checkpointed at transaction boundaries only after Kafka
+    acknowledged everything before it, so a restart replays at most the
+    unacknowledged tail (at-least-once). A failed delivery stops the producer
+    without moving the checkpoint, and the restart replays the failed records.
+    """
+
+    def __init__(self,server_id,checkpoint_path,checkpoint_every=5.0):
+        self.server_id = server_id
+        self.checkpoint = BinlogCheckpoint(checkpoint_path)
+        self.checkpoint_every = checkpoint_every
+        self.producer = Producer(conf)
+        self.encoder = get_encoder()  # EVENT_ENCODING, the same as the live producer
+        self.lookups = Lookups()
+        self.running = True
+        self.produced = 0
+        self.failed = 0
+
+    def stop(self,signum=None,frame=None):
+        self.running = False
+
+    def delivery_report(self,err,msg):
+        if err is not None:
+            self.failed += 1
+            print(f" Delivery failed for record {msg.key()}: {err}")
+
+    def save_checkpoint(self,committed):
+        """
+        Flushes the producer and saves the position only if every record so far was acknowledged.
+        """
+        self.producer.flush()
+        if self.failed:
+            return False
+        self.checkpoint.save(*committed)
+        return True
+
+    def publish(self,topic,record_type,payload):
+        # Keyed by order id so each topic spreads over all partitions
+        self.producer.produce(topic,key=payload['orderId'],value=self.encoder.encode(topic,payload),
+                              headers=[('recordType',record_type.encode())] + self.encoder.headers(topic),callback=self.delivery_report)
+        self.producer.poll(0)
+        self.produced += 1
+
+    def handle_row(self,schema,table,values,event_time):
+        if schema == ORDER_MANAGEMENT_DB and table == 'order_status':
+            order_id = values['order_id']
+            summary = self.lookups.order_summary(order_id)
+            if summary is None:
+                return
+            self.publish('order_created','order',{
+                'orderId':order_id,
+                'customerId':summary[5],
+                'orderStatus':values['order_status'],
+                'orderSummary':{
+                    'itemsSubtotal':str(summary[0]),
+                    'tax':str(summary[1]),
+                    'discount':str(summary[2]),
+                    'grandTotal':str(summary[3])
+                },
+                'created_at':summary[4].isoformat(),
+                'eventTime':event_time
+            })
+
+        elif schema == ORDER_MANAGEMENT_DB and table == 'order_summary':
+            order_id = values['order_id']
+            self.publish('inventory_created','inventory',{
+                'orderId':order_id,
+                'itemsOrdered':self.lookups.order_items(order_id),
+                'eventTime':event_time
+            })
+            customer = self.lookups.order_customer(order_id)
+            if customer is not None:
+                self.publish('customer_created','customer',{
+                    'orderId':order_id,
+                    'customerId':customer[0],
+                    'name':customer[1],
+                    'mobileNumber':customer[2],
+                    'emailId':customer[3],
+                    'address':customer[4],
+                    'eventTime':event_time
+                })
+
+        elif schema == TRANSACTION_MANAGEMENT_DB and table == 'payment_transaction':
+            self.publish('payment_created','payment',{
+                'orderId':values['order_id'],
+                'transactionId':values['transaction_id'],
+                'paymentType':self.lookups.payment_name('payment_type','payment_types',values['payment_type_id']),
+                'paymentMethod':self.lookups.payment_name('payment_method','payment_methods',values['payment_method_id']),
+                'amount':str(values['amount']),
+                'paymentStatus':self.lookups.payment_name('payment_status','payment_status',values['payment_status_id']),
+                'processedAt':values['processed_at'].isoformat(),
+                'eventTime':event_time
+            })
+
+        elif schema == SHIPPING_MANAGEMENT_DB and table == 'shipment_status':
+            tracker = self.lookups.tracker(values['tracker_id'])
+            if tracker is None:
+                return
+            order_id,delivery_to = tracker
+            self.publish('shipment_created','shipment',{
+                'orderId':order_id,
+                'trackerId':values['tracker_id'],
+                'deliveryTo':delivery_to,
+                'shippingStatus':values['shipment_status'],
+                'updated_at':values['updated_at'].isoformat(),
+                'eventTime':event_time
+            })
+
+    def run(self):
+        signal.signal(signal.SIGINT,self.stop)
+        signal.signal(signal.SIGTERM,self.stop)
+
+        position = self.checkpoint.load()
+        stream = BinLogStreamReader(
+            connection_settings=MYSQL_SETTINGS,
+            server_id=self.server_id,
+            only_schemas=[USER_MANAGEMENT_DB,INVENTORY_MANAGEMENT_DB,ORDER_MANAGEMENT_DB,
+                          TRANSACTION_MANAGEMENT_DB,SHIPPING_MANAGEMENT_DB],
+            only_events=[WriteRowsEvent,UpdateRowsEvent,DeleteRowsEvent,XidEvent,HeartbeatLogEvent],
+            resume_stream=position is not None,
+            log_file=position['log_file'] if position else None,
+            log_pos=position['log_pos'] if position else None,
+            blocking=True,
+            slave_heartbeat=1
+        )
+        committed = None  # position after the last transaction seen, safe to resume from
+        last_checkpoint = time.monotonic()
+
+        try:
+            for binlogevent in stream:
+                if isinstance(binlogevent,XidEvent):
+                    committed = (stream.log_file,stream.log_pos)
+                elif isinstance(binlogevent,WriteRowsEvent):
+                    event_time = datetime.fromtimestamp(binlogevent.timestamp,timezone.utc).isoformat()
+                    self.lookups.invalidate(binlogevent.schema,binlogevent.table)
+                    for row in binlogevent.rows:
+                        self.handle_row(binlogevent.schema,binlogevent.table,row['values'],event_time)
+                elif not isinstance(binlogevent,HeartbeatLogEvent):
+                    self.lookups.invalidate(binlogevent.schema,binlogevent.table)
+
+                # Heartbeats arrive every second while idle, so checkpoints and shutdown are never starved.
+                if committed and time.monotonic() - last_checkpoint > self.checkpoint_every:
+                    if not self.save_checkpoint(committed):
+                        raise RuntimeError(f'{self.failed} deliveries failed, stopping at the last acknowledged checkpoint')
+                    last_checkpoint = time.monotonic()
+                if not self.running:
+                    break
+        finally:
+            if committed:
+                self.save_checkpoint(committed)
+            else:
+                self.producer.flush()
+            stream.close()
+            self.lookups.commit_and_close()
+            print(f" CDC producer stopped after producing {self.produced} records, {self.failed} failed")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Publish topic payloads from the MySQL binlog.')
+    parser.add_argument('--server-id',type=int,default=4242,help='unique replica server id for this reader')
+    parser.add_argument('--checkpoint',default='binlog_checkpoint.json',help='file storing the last acknowledged binlog position')
+    parser.add_argument('--checkpoint-every',type=float,default=5.0,help='seconds between checkpoints while streaming')
+    args = parser.parse_args()
+
+    BinlogCdcProducer(args.server_id,args.checkpoint,args.checkpoint_every).run()
@@ -1,87 +1,215 @@
-from confluent_kafka import Producer
-import json
-from datetime import datetime, timezone
+from confluent_kafka import Producer, KafkaException
+from dotenv import load_dotenv
+import argparse
+import time
+import os
 from order_details import OrderDetails  # Import OrderDetails from order_details.py
+from event_encoding import get_encoder
+from order_payloads import TOPIC_RECORD_TYPES, order_messages
+from producer_metrics import ProducerMetrics
+
+load_dotenv()
+
+# Value encoding of every topic, 'json' (default) or 'avro' from EVENT_ENCODING
+encoder = get_encoder()
 
 # Configuration for Kafka producer
 conf = {
-    'bootstrap.servers': 'HOST:PORT',
+    'bootstrap.servers': os.getenv('KAFKA_BOOTSTRAP_SERVERS', 'HOST:PORT'),
     'client.id': 'order-producer'
 }
 
-# Initialize the Kafka producer
-producer = Producer(conf)
+# Throughput mode: messages of many orders are batched per partition for up to
+# linger.ms, compressed per batch and acknowledged by all in-sync replicas.
+# Idempotence keeps broker retries from duplicating or reordering messages.
+throughput_conf = {
+    **conf,
+    'linger.ms': 50,
+    'batch.size': 1048576,
+    'compression.type': 'lz4',
+    'acks': 'all',
+    'enable.idempotence': True,
+    'queue.buffering.max.messages': 1000000,
+    'queue.buffering.max.kbytes': 1048576
+}
+
+# Transactional mode: the batched configuration plus a transactional.id, so the five
+# records of every order in a transaction become visible to read_committed consumers
+# together or not at all. Each concurrently running producer needs its own id.
+transactional_conf = {
+    **throughput_conf,
+    'transactional.id': os.getenv('KAFKA_TRANSACTIONAL_ID', 'order-producer-1'),
+    'transaction.timeout.ms': 60000
+}
+
+# Kafka producer shared by every publish in this process, created on first use
+producer = None
 
-# Callback for delivery report
+def get_producer(throughput=False, transactional=False):
+    global producer
+    if producer is None:
+        if transactional:
+            producer = Producer(transactional_conf)
+            # Fences off an earlier instance with the same transactional.id and aborts its open transaction
+            producer.init_transactions(30)
+        else:
+            producer = Producer(throughput_conf if throughput else conf)
+    return producer
+
+# Produce one message, waiting for queue space instead of failing when the local queue is full
+def produce_message(kafka_producer, topic, key, value, callback=None):
+    headers = [("recordType", TOPIC_RECORD_TYPES[topic].encode())] if topic in TOPIC_RECORD_TYPES else None
+    if headers:
+        headers.extend(encoder.headers(topic))
+    while True:
+        try:
+            kafka_producer.produce(topic, key=key, value=value, headers=headers, callback=callback)
+            return
+        except BufferError:
+            kafka_producer.poll(0.1)
+
+# Delivery counters, latency histograms and error counts of this process's producer
+metrics = ProducerMetrics()
+
+# Callback for delivery report, only failures are printed
 def delivery_report(err, msg):
+    metrics(err, msg)
     if err is not None:
         print(f" Delivery failed for record {msg.key()}: {err}")
-    else:
-        print(f" Record {msg.key()} successfully produced to {msg.topic()} [{msg.partition()}]")
-
-# Helper function to get current UTC time in ISO 8601 format
-def current_event_time():
-    return datetime.now(timezone.utc).isoformat()
 
 # Function to publish order messages to Kafka
-def publish_order_messages():
-    obj = OrderDetails()
-    order_data = obj.confirm_order()
-
-    # Create output messages with event time
-    customer_output = {
-        "orderId": order_data["orderId"],
-        "customerId": order_data["customerDetails"]["id"],
-        "name": order_data["customerDetails"]["name"],
-        "mobileNumber": order_data["customerDetails"]["mobileNumber"],
-        "emailId": order_data["customerDetails"]["emailId"],
-        "address": order_data["customerDetails"]["address"]["country"],
-        "eventTime": current_event_time()
-    }
-
-    inventory_output = {
-        "orderId": order_data["orderId"],
-        "itemsOrdered": order_data["orderDetails"]["itemsOrdered"],
-        "eventTime": current_event_time()
-    }
-
-    order_output = {
-        "orderId": order_data["orderId"],
-        "orderStatus": order_data["orderDetails"]["orderStatus"],
-        "orderSummary": order_data["orderDetails"]["orderSummary"],
-        "created_at": order_data["orderDetails"]["created_at"],
-        "eventTime": current_event_time()
-    }
-
-    payment_output = {
-        "orderId": order_data["orderId"],
-        "transactionId": order_data["paymentDetails"]["transactionId"],
-        "paymentType": order_data["paymentDetails"]["paymentType"],
-        "paymentMethod": order_data["paymentDetails"]["paymentMethod"],
-        "amount": order_data["paymentDetails"]["amount"],
-        "paymentStatus": order_data["paymentDetails"]["paymentStatus"],
-        "processedAt": order_data["paymentDetails"]["processedAt"],
-        "eventTime": current_event_time()
-    }
-
-    shipment_output = {
-        "orderId": order_data["orderId"],
-        "trackerId": order_data["shippingDetails"]["trackerId"] if order_data["shippingDetails"] else None,
-        "deliveryTo": order_data["shippingDetails"]["deliveryTo"] if order_data["shippingDetails"] else None,
-        "shippingStatus": order_data["shippingDetails"]["shippingStatus"] if order_data["shippingDetails"] else None,
-        "updated_at": order_data["shippingDetails"]["updated_at"] if order_data["shippingDetails"] else None,
-        "eventTime": current_event_time()
-    }
+def publish_order_messages(order_data=None, kafka_producer=None, callback=delivery_report, flush=True):
+    if order_data is None:
+        obj = OrderDetails()
+        order_data = obj.confirm_order()
+    kafka_producer = kafka_producer or get_producer()
 
     # Produce messages to Kafka
-    producer.produce("customer_created", key="customer", value=json.dumps(customer_output), callback=delivery_report)
-    producer.produce("inventory_created", key="inventory", value=json.dumps(inventory_output), callback=delivery_report)
-    producer.produce("order_created", key="order", value=json.dumps(order_output), callback=delivery_report)
-    producer.produce("payment_created", key="payment", value=json.dumps(payment_output), callback=delivery_report)
-    producer.produce("shipment_created", key="shipment", value=json.dumps(shipment_output), callback=delivery_report)
+    for topic, key, payload in order_messages(order_data):
+        produce_message(kafka_producer, topic, key, encoder.encode(topic, payload), callback)
 
-    # Flush to ensure delivery
-    producer.flush()
+    if flush:
+        # Flush to ensure delivery
+        kafka_producer.flush()
+    else:
+        # Serve delivery callbacks of earlier messages without waiting for this order
+        kafka_producer.poll(0)
+
+# Function to publish many orders without waiting for the broker between them
+def publish_orders_throughput(order_count):
+    kafka_producer = get_producer(throughput=True)
+    try:
+        for _ in range(order_count):
+            publish_order_messages(kafka_producer=kafka_producer, callback=delivery_report, flush=False)
+            metrics.sample_queue(kafka_producer)
+    finally:
+        # Flush once on shutdown so every queued message is delivered
+        kafka_producer.flush()
+
+class TransactionalPublisher:
+    """
+    Publishes orders in Kafka transactions, many orders per transaction.
+
+    A transaction is committed once it holds orders_per_transaction orders or
+    has been open for max_transaction_seconds, whichever comes first. If the
+    process dies before the commit, the broker aborts the transaction and
+    read_committed consumers never see any record of its orders, so no order
+    is left half published. Any error while an order is being published drops
+    the whole open transaction and is raised to the caller, as does a commit
+    that still fails after max_commit_retries retriable errors.
+    """
+
+    def __init__(self, kafka_producer=None, orders_per_transaction=500, max_transaction_seconds=1.0, callback=None,
+                 max_commit_retries=5):
+        self.producer = kafka_producer or get_producer(transactional=True)
+        self.orders_per_transaction = orders_per_transaction
+        self.max_transaction_seconds = max_transaction_seconds
+        self.callback = callback
+        self.max_commit_retries = max_commit_retries
+        self.open_orders = 0
+        self.opened_at = None
+        self.committed_orders = 0
+        self.committed_transactions = 0
+        self.aborted_transactions = 0
+
+    def publish(self, order_data):
+        if self.opened_at is None:
+            self.producer.begin_transaction()
+            self.opened_at = time.monotonic()
+        try:
+            publish_order_messages(order_data, self.producer, callback=self.callback, flush=False)
+        except Exception:
+            self.abort()
+            raise
+        self.open_orders += 1
+        if self.open_orders >= self.orders_per_transaction:
+            self.commit()
+
+    def maybe_commit(self):
+        # Bounds the latency of slow producers, read_committed consumers wait for the commit
+        if self.opened_at is not None and time.monotonic() - self.opened_at >= self.max_transaction_seconds:
+            self.commit()
+
+    def commit(self):
+        if self.opened_at is None:
+            return
+        retries = 0
+        while True:
+            try:
+                self.producer.commit_transaction(60)  # flushes the transaction's messages first
+                break
+            except KafkaException as e:
+                error = e.args[0]
+                if error.retriable() and retries < self.max_commit_retries:
+                    retries += 1
+                    time.sleep(min(2 ** retries, 10) * 0.1)  # back off before retrying
+                    continue
+                if error.txn_requires_abort() or error.retriable():
+                    self.abort()
+                raise e
+        self.committed_orders += self.open_orders
+        self.committed_transactions += 1
+        self.open_orders = 0
+        self.opened_at = None
+
+    def abort(self):
+        if self.opened_at is None:
+            return
+        self.producer.abort_transaction(60)
+        self.aborted_transactions += 1
+        self.open_orders = 0
+        self.opened_at = None
+
+# Function to publish many orders in transactions of orders_per_transaction orders
+def publish_orders_transactional(order_count, orders_per_transaction):
+    publisher = TransactionalPublisher(orders_per_transaction=orders_per_transaction, callback=delivery_report)
+    try:
+        for _ in range(order_count):
+            publisher.publish(OrderDetails().confirm_order())
+            publisher.maybe_commit()
+            metrics.sample_queue(publisher.producer)
+        publisher.commit()
+    except Exception:
+        publisher.abort()
+        raise
+    print(f" Committed {publisher.committed_orders} orders in {publisher.committed_transactions} transactions")
 
 if __name__ == "__main__":
-    publish_order_messages()
+    parser = argparse.ArgumentParser(description='Publish customer orders to Kafka.')
+    parser.add_argument('--throughput', action='store_true', help='batch and compress, flush only on shutdown')
+    parser.add_argument('--transactional', action='store_true', help='publish orders atomically in Kafka transactions')
+    parser.add_argument('--orders-per-transaction', type=int, default=500, help='orders per transaction in transactional mode')
+    parser.add_argument('--orders', type=int, default=1, help='number of orders to publish')
+    args = parser.parse_args()
+
+    try:
+        if args.transactional:
+            publish_orders_transactional(args.orders, args.orders_per_transaction)
+        elif args.throughput:
+            publish_orders_throughput(args.orders)
+        else:
+            for _ in range(args.orders):
+                publish_order_messages()
+    finally:
+        # Delivery summary at exit, printed or written to PRODUCER_METRICS_FILE
+        metrics.dump(os.getenv('PRODUCER_METRICS_FILE'), producer)
@@ -0,0 +1,65 @@
+import argparse
+import random
+import time
+import json
+from order_payloads import order_messages
+from event_encoding import JsonEncoder, AvroEncoder
+from sample_orders import sample_order_data
+
+def measure(encoder, messages, repeat):
+    """
+    Returns total payload bytes, encode and decode rates of one encoder over the same messages.
+    The rates are for the Python codecs (json/orjson, fastavro) in this process;
+    they say nothing about Spark's from_json or from_avro throughput.
+    """
+    encoded = [(topic, encoder.encode(topic, payload)) for topic, payload in messages]
+    total_bytes = sum(len(value) for _, value in encoded)
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for topic, payload in messages:
+            encoder.encode(topic, payload)
+    encode_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for topic, value in encoded:
+            encoder.decode(topic, value)
+    decode_elapsed = time.perf_counter() - started
+
+    count = len(messages) * repeat
+    return {
+        'encoding': encoder.name,
+        'messages': len(messages),
+        'totalBytes': total_bytes,
+        'avgBytesPerMessage': round(total_bytes / len(messages), 1),
+        'pythonEncodePerSecond': round(count / encode_elapsed, 1),
+        'pythonDecodePerSecond': round(count / decode_elapsed, 1)
+    }
+
+def bytes_per_topic(encoder, messages):
+    sizes = {}
+    for topic, payload in messages:
+        sizes.setdefault(topic, []).append(len(encoder.encode(topic, payload)))
+    return {topic: round(sum(values) / len(values), 1) for topic, values in sizes.items()}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compare JSON and Avro payload size and Python codec throughput (not Spark decoding).')
+    parser.add_argument('--orders', type=int, default=20000, help='synthetic orders to encode')
+    parser.add_argument('--repeat', type=int, default=3, help='passes over the messages per measurement')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    messages = [(topic, payload)
+                for _ in range(args.orders)
+                for topic, _, payload in order_messages(sample_order_data(rng))]
+
+    encoders = [JsonEncoder(), AvroEncoder()]
+    results = [measure(encoder, messages, args.repeat) for encoder in encoders]
+    json_result, avro_result = results
+    print(json.dumps({
+        'results': results,
+        'avgBytesPerTopic': {encoder.name: bytes_per_topic(encoder, messages) for encoder in encoders},
+        'avroSizeRatio': round(avro_result['totalBytes'] / json_result['totalBytes'], 3)
+    }, indent=4))
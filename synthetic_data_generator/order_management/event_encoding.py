@@ -0,0 +1,118 @@
+from datetime import datetime
+import io
+import json
+import os
+
+try:
+    import fastavro
+except ImportError:  # optional, only the avro encoding needs it
+    fastavro = None
+
+try:
+    import orjson
+except ImportError:  # optional, the standard library json is used without it
+    orjson = None
+
+# JSON library of the json encoding: orjson when installed, 'json' forces the standard library
+JSON_LIBRARY = os.getenv('JSON_LIBRARY', 'orjson' if orjson is not None else 'json')
+if JSON_LIBRARY == 'orjson' and orjson is None:
+    raise ImportError("JSON_LIBRARY=orjson but orjson is not installed, run pip install orjson or set JSON_LIBRARY=json")
+if JSON_LIBRARY not in ('orjson', 'json'):
+    raise ValueError(f"unknown JSON_LIBRARY: {JSON_LIBRARY}")
+
+def dumps(payload, default=None):
+    """
+    Serializes a payload to JSON bytes, ready for producer.produce().
+    """
+    if JSON_LIBRARY == 'orjson':
+        return orjson.dumps(payload, default=default)
+    return json.dumps(payload, default=default).encode()
+
+def loads(value):
+    if JSON_LIBRARY == 'orjson':
+        return orjson.loads(value)
+    return json.loads(value)
+
+# Versioned Avro schemas shared with pyspark/streaming.py
+SCHEMA_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'schemas', 'avro')
+SCHEMA_VERSION = os.getenv('EVENT_SCHEMA_VERSION', 'v1')
+
+# Timestamp fields of each topic, sent as ISO strings in JSON and as timestamp-micros in Avro
+TIMESTAMP_FIELDS = {
+    'customer_created': ['eventTime'],
+    'inventory_created': ['eventTime'],
+    'order_created': ['created_at', 'eventTime'],
+    'payment_created': ['processedAt', 'eventTime'],
+    'shipment_created': ['updated_at', 'eventTime'],
+    'order_event': ['created_at', 'eventTime']
+}
+
+def parse_timestamp(value):
+    """
+    Parses an ISO 8601 timestamp. A trailing 'Z' (e.g. from the offline generator)
+    is rewritten as +00:00, which datetime.fromisoformat() only accepts from Python 3.11.
+    """
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    return datetime.fromisoformat(value)
+
+def load_schema(topic, version=SCHEMA_VERSION):
+    with open(os.path.join(SCHEMA_ROOT, version, f'{topic}.avsc')) as f:
+        return fastavro.parse_schema(json.load(f))
+
+class JsonEncoder:
+    """
+    The original encoding: one JSON document per message, serialized with JSON_LIBRARY.
+    """
+    name = 'json'
+
+    def encode(self, topic, payload):
+        return dumps(payload, default=str)
+
+    def headers(self, topic):
+        return []
+
+    def decode(self, topic, value):
+        return loads(value)
+
+class AvroEncoder:
+    """
+    Schemaless Avro binary: no field names on the wire, timestamps as 8-byte
+    varint longs. The schema version travels in the schemaVersion header, so
+    consumers pick the matching schema from schemas/avro/<version>. Topics
+    without a schema, e.g. customer_registered, stay JSON and get no header.
+    """
+    name = 'avro'
+
+    def __init__(self, version=SCHEMA_VERSION):
+        if fastavro is None:
+            raise ImportError('the avro encoding needs the fastavro package')
+        self.version = version
+        self.schemas = {topic: load_schema(topic, version) for topic in TIMESTAMP_FIELDS}
+
+    def encode(self, topic, payload):
+        if topic not in self.schemas:
+            return dumps(payload, default=str)
+        record = dict(payload)
+        for field in TIMESTAMP_FIELDS[topic]:
+            if isinstance(record.get(field), str):
+                record[field] = parse_timestamp(record[field])
+        buffer = io.BytesIO()
+        fastavro.schemaless_writer(buffer, self.schemas[topic], record)
+        return buffer.getvalue()
+
+    def decode(self, topic, value):
+        if topic not in self.schemas:
+            return loads(value)
+        return fastavro.schemaless_reader(io.BytesIO(value), self.schemas[topic])
+
+    def headers(self, topic):
+        return [('schemaVersion', self.version.encode())] if topic in self.schemas else []
+
+def get_encoder(name=None):
+    name = name or os.getenv('EVENT_ENCODING', 'json')
+    if name == 'avro':
+        return AvroEncoder()
+    if name == 'json':
+        return JsonEncoder()
+    raise ValueError(f'unknown event encoding: {name}')
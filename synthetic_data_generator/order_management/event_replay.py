@@ -0,0 +1,329 @@
+from datetime import datetime
+import argparse
+import struct
+import gzip
+import time
+import json
+import os
+from event_encoding import get_encoder, AvroEncoder, dumps
+
+TOPICS = ['customer_created', 'inventory_created', 'order_created', 'payment_created', 'shipment_created']
+
+# Record frame: timestamp ms, topic, key, value and header section lengths, then the bytes themselves
+FRAME = struct.Struct('>qHIII')
+
+def encode_headers(headers):
+    return json.dumps([[name, value.decode('latin-1')] for name, value in headers or []]).encode() if headers else b''
+
+def decode_headers(raw):
+    return [(name, value.encode('latin-1')) for name, value in json.loads(raw)] if raw else None
+
+class SegmentWriter:
+    """
+    Writes records into gzip-compressed segment files of at most
+    records_per_segment records each, with the original timestamp of every
+    record. close() writes manifest.json with the segments, record count,
+    topics and time range of the recording.
+    """
+
+    def __init__(self, directory, records_per_segment=500000):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.records_per_segment = records_per_segment
+        self.segments = []
+        self.file = None
+        self.segment_records = 0
+        self.records = 0
+        self.topics = {}
+        self.first_timestamp = None
+        self.last_timestamp = None
+
+    def roll(self):
+        if self.file is not None:
+            self.file.close()
+        name = f'segment-{len(self.segments):05d}.bin.gz'
+        self.segments.append(name)
+        self.file = gzip.open(os.path.join(self.directory, name), 'wb', compresslevel=1)
+        self.segment_records = 0
+
+    def write(self, timestamp_ms, topic, key, value, headers=None):
+        if self.file is None or self.segment_records >= self.records_per_segment:
+            self.roll()
+        topic = topic.encode()
+        key = key.encode() if isinstance(key, str) else (key or b'')
+        value = value.encode() if isinstance(value, str) else value
+        raw_headers = encode_headers(headers)
+        self.file.write(FRAME.pack(timestamp_ms, len(topic), len(key), len(value), len(raw_headers)))
+        self.file.write(topic + key + value + raw_headers)
+        self.segment_records += 1
+        self.records += 1
+        self.topics[topic.decode()] = self.topics.get(topic.decode(), 0) + 1
+        if self.first_timestamp is None:
+            self.first_timestamp = timestamp_ms
+        self.last_timestamp = timestamp_ms
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+        manifest = {
+            'segments': self.segments,
+            'records': self.records,
+            'topics': self.topics,
+            'firstTimestampMs': self.first_timestamp,
+            'lastTimestampMs': self.last_timestamp,
+            'recordedAt': datetime.now().isoformat()
+        }
+        with open(os.path.join(self.directory, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=4)
+        return manifest
+
+def read_segments(directory, topics=None):
+    """
+    Yields (timestamp_ms, topic, key, value, headers) of a recording in recorded order.
+    """
+    with open(os.path.join(directory, 'manifest.json')) as f:
+        manifest = json.load(f)
+    for name in manifest['segments']:
+        with gzip.open(os.path.join(directory, name), 'rb') as f:
+            while True:
+                frame = f.read(FRAME.size)
+                if not frame:
+                    break
+                timestamp_ms, topic_length, key_length, value_length, headers_length = FRAME.unpack(frame)
+                body = f.read(topic_length + key_length + value_length + headers_length)
+                topic = body[:topic_length].decode()
+                if topics and topic not in topics:
+                    continue
+                key = body[topic_length:topic_length + key_length]
+                value = body[topic_length + key_length:topic_length + key_length + value_length]
+                headers = decode_headers(body[topic_length + key_length + value_length:])
+                yield timestamp_ms, topic, key, value, headers
+
+def record_from_kafka(writer, topics, max_records=None, duration=None, idle_timeout=10.0):
+    """
+    Consumes the topics from the earliest offset with a throwaway consumer group
+    and records every message with its Kafka timestamp.
+    """
+    from confluent_kafka import Consumer
+    consumer = Consumer({
+        'bootstrap.servers': os.getenv('KAFKA_BOOTSTRAP_SERVERS', 'HOST:PORT'),
+        'group.id': f'event-recorder-{int(time.time())}',
+        'auto.offset.reset': 'earliest',
+        'enable.auto.commit': False,
+        'isolation.level': 'read_committed'
+    })
+    consumer.subscribe(topics)
+    started = time.monotonic()
+    last_message = time.monotonic()
+    try:
+        while (max_records is None or writer.records < max_records) and \
+                (duration is None or time.monotonic() - started < duration):
+            messages = consumer.consume(10000, timeout=1.0)
+            if not messages:
+                if time.monotonic() - last_message > idle_timeout:
+                    break  # caught up with the end of the topics
+                continue
+            last_message = time.monotonic()
+            for msg in messages:
+                if msg.error():
+                    print(f" Consume error: {msg.error()}")
+                    continue
+                writer.write(msg.timestamp()[1], msg.topic(), msg.key(), msg.value(), msg.headers())
+    finally:
+        consumer.close()
+
+def record_from_generator(writer, orders, chunk_size=50000, mode='topics', orders_per_second=1000.0, seed=None):
+    """
+    Records the offline generator's events, timestamped with their eventTime and
+    encoded with EVENT_ENCODING, so a Kafka replay matches the live producers.
+    """
+    from offline_event_generator import OfflineEventGenerator, json_records
+    generator = OfflineEventGenerator(seed=seed, orders_per_second=orders_per_second)
+    encoder = get_encoder()
+    for first in range(0, orders, chunk_size):
+        chunk = generator.chunk(min(chunk_size, orders - first))
+        records = json_records(chunk, mode)
+        # Interleave the topics of each order in event time, as the live producer emits them
+        rows = []
+        for topic, values in records.items():
+            times = chunk['eventTime'][topic if topic in chunk['eventTime'] else 'order_created'] // 1000
+            rows.extend(zip(times.tolist(), [topic] * len(values), chunk['orderId'], values))
+        rows.sort(key=lambda row: row[0])
+        for timestamp_ms, topic, key, value in rows:
+            if encoder.name != 'json':
+                value = encoder.encode(topic, json.loads(value))
+            writer.write(timestamp_ms, topic, key, value,
+                         [('recordType', topic.split('_created')[0].encode())] + encoder.headers(topic))
+
+class Pacer:
+    """
+    Decides when the next record is due.
+
+    speed 1 replays the recorded inter-arrival gaps as they were, N compresses
+    them N times and 0 replays as fast as possible. A constant rate (records per
+    second) ignores the recorded gaps. A record is due when the latest timestamp
+    seen so far is due, counted from the first one, so a recording that zigzags
+    in time across partitions replays in its original span; records behind the
+    latest timestamp are sent at once.
+    """
+
+    def __init__(self, speed=1.0, rate=None):
+        self.speed = speed
+        self.rate = rate
+        self.started = None
+        self.offset_ms = 0
+        self.first_timestamp = None
+        self.count = 0
+
+    def due(self, timestamp_ms):
+        """
+        Returns the monotonic time the record is due at, None when it is due now.
+        """
+        if self.started is None:
+            self.started = time.monotonic()
+        self.count += 1
+        if self.rate:
+            return self.started + (self.count - 1) / self.rate
+        if not self.speed:
+            return None
+        if self.first_timestamp is None:
+            self.first_timestamp = timestamp_ms
+        self.offset_ms = max(self.offset_ms, timestamp_ms - self.first_timestamp)
+        return self.started + self.offset_ms / 1000 / self.speed
+
+class KafkaTarget:
+    def __init__(self, keep_timestamps=False):
+        from confluent_kafka import Producer
+        from confluent_kafka_producer import throughput_conf, metrics
+        self.producer = Producer(throughput_conf)
+        self.metrics = metrics
+        self.keep_timestamps = keep_timestamps
+
+    def wait(self, seconds):
+        self.producer.poll(seconds)
+
+    def write(self, timestamp_ms, topic, key, value, headers):
+        timestamp = timestamp_ms if self.keep_timestamps else 0  # 0 lets the producer stamp the send time
+        while True:
+            try:
+                self.producer.produce(topic, key=key, value=value, headers=headers,
+                                      timestamp=timestamp, callback=self.metrics)
+                return
+            except BufferError:
+                self.producer.poll(0.1)
+
+    def close(self):
+        self.producer.flush()
+        self.metrics.dump(os.getenv('PRODUCER_METRICS_FILE'), self.producer)
+
+class FileTarget:
+    """
+    Writes the values of each topic as JSON lines into <directory>/<topic>/, one
+    file per records_per_file records. Avro values, recognised by their
+    schemaVersion header, are decoded to JSON first. Files are written under a
+    temporary name and renamed when complete, so a Spark file stream source only
+    sees whole files.
+    """
+
+    def __init__(self, directory, records_per_file=10000):
+        self.directory = directory
+        self.records_per_file = records_per_file
+        self.buffers = {}
+        self.files_written = 0
+        self.avro = {}
+
+    def wait(self, seconds):
+        time.sleep(seconds)
+
+    def write(self, timestamp_ms, topic, key, value, headers):
+        version = dict(headers or []).get('schemaVersion')
+        if version is not None:
+            version = version.decode()
+            if version not in self.avro:
+                self.avro[version] = AvroEncoder(version)
+            value = dumps(self.avro[version].decode(topic, value), default=lambda field: field.isoformat())
+        buffer = self.buffers.setdefault(topic, [])
+        buffer.append(value)
+        if len(buffer) >= self.records_per_file:
+            self.flush_topic(topic)
+
+    def flush_topic(self, topic):
+        buffer = self.buffers.get(topic)
+        if not buffer:
+            return
+        os.makedirs(os.path.join(self.directory, topic), exist_ok=True)
+        path = os.path.join(self.directory, topic, f'part-{self.files_written:06d}.jsonl')
+        with open(f'{os.path.dirname(path)}/.{os.path.basename(path)}.tmp', 'wb') as f:
+            f.write(b'\n'.join(buffer) + b'\n')
+        os.rename(f'{os.path.dirname(path)}/.{os.path.basename(path)}.tmp', path)
+        self.files_written += 1
+        self.buffers[topic] = []
+
+    def close(self):
+        for topic in list(self.buffers):
+            self.flush_topic(topic)
+
+def replay(directory, target, pacer, topics=None):
+    started = time.monotonic()
+    records = 0
+    max_lag = 0.0
+    for timestamp_ms, topic, key, value, headers in read_segments(directory, topics):
+        due = pacer.due(timestamp_ms)
+        if due is not None:
+            delay = due - time.monotonic()
+            if delay > 0.001:
+                target.wait(delay)
+            else:
+                max_lag = max(max_lag, -delay)  # how far the replay fell behind the schedule
+        target.write(timestamp_ms, topic, key, value, headers)
+        records += 1
+    target.close()
+    elapsed = time.monotonic() - started
+    return {
+        'records': records,
+        'elapsedSeconds': round(elapsed, 3),
+        'recordsPerSecond': round(records / elapsed, 1) if elapsed else None,
+        'maxScheduleLagSeconds': round(max_lag, 3)
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Record order event streams into segment files and replay them.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record = commands.add_parser('record', help='capture events into a recording directory')
+    record.add_argument('directory')
+    record.add_argument('--source', choices=['kafka', 'generator'], default='kafka')
+    record.add_argument('--topics', default=','.join(TOPICS), help='comma separated topics to consume')
+    record.add_argument('--max-records', type=int, default=None, help='stop after this many records')
+    record.add_argument('--duration', type=float, default=None, help='stop after this many seconds')
+    record.add_argument('--orders', type=int, default=100000, help='orders to generate with --source generator')
+    record.add_argument('--mode', choices=['topics', 'envelope', 'both'], default=os.getenv('ORDER_TOPIC_MODE', 'topics'))
+    record.add_argument('--orders-per-second', type=float, default=1000.0, help='simulated order rate of the generator')
+    record.add_argument('--seed', type=int, default=None)
+    record.add_argument('--records-per-segment', type=int, default=500000)
+
+    play = commands.add_parser('replay', help='replay a recording to Kafka or files')
+    play.add_argument('directory')
+    play.add_argument('--target', choices=['kafka', 'files'], default='kafka')
+    play.add_argument('--output-dir', default='replayed_events', help='directory of the files target')
+    play.add_argument('--topics', default=None, help='comma separated topics to replay, all by default')
+    play.add_argument('--speed', type=float, default=1.0, help='1 keeps the recorded gaps, N is N times faster, 0 is max speed')
+    play.add_argument('--rate', type=float, default=None, help='constant records per second instead of the recorded gaps')
+    play.add_argument('--keep-timestamps', action='store_true', help='produce with the recorded Kafka timestamps')
+    play.add_argument('--records-per-file', type=int, default=10000)
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        writer = SegmentWriter(args.directory, args.records_per_segment)
+        try:
+            if args.source == 'kafka':
+                record_from_kafka(writer, args.topics.split(','), args.max_records, args.duration)
+            else:
+                record_from_generator(writer, args.orders, mode=args.mode,
+                                      orders_per_second=args.orders_per_second, seed=args.seed)
+        finally:
+            print(json.dumps(writer.close(), indent=4))
+    else:
+        target = KafkaTarget(args.keep_timestamps) if args.target == 'kafka' else FileTarget(args.output_dir, args.records_per_file)
+        topics = set(args.topics.split(',')) if args.topics else None
+        print(json.dumps(replay(args.directory, target, Pacer(args.speed, args.rate), topics), indent=4))
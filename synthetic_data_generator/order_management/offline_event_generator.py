@@ -0,0 +1,351 @@
+from datetime import datetime, timezone
+import numpy as np
+import argparse
+import time
+import json
+import os
+
+# Catalog in the shape of the inventory seed data: product, material, seller, price, tax rate, discount rate
+CATALOG = [
+    ('Chair', 'Wooden', 'Cummings and Sons', 887.52, 0.12, 0.05),
+    ('Chair', 'Plastic', 'Wise Inc', 448.58, 0.12, 0.1),
+    ('Chair', 'Metal', 'Becker Ltd', 828.61, 0.12, 0.05),
+    ('Car', 'Steel', 'Jones LLC', 114.24, 0.18, 0.0),
+    ('Car', 'Plastic', 'Gonzalez and Sons', 487.94, 0.18, 0.1),
+    ('Car', 'Rubber', 'Simpson LLC', 180.53, 0.18, 0.1),
+    ('Computer', 'Plastic', 'Banks PLC', 56.15, 0.15, 0.1),
+    ('Computer', 'Metal', 'Smith Group', 64.78, 0.15, 0.05)
+]
+COUNTRIES = ['India', 'United States', 'United Kingdom', 'Canada', 'Australia', 'Germany', 'France', 'Japan']
+PAYMENT_STATUSES = ['paid', 'pending', 'failed']
+PAYMENT_STATUS_WEIGHTS = [0.9, 0.06, 0.04]
+ORDER_STATUSES = {'paid': 'Confirmed', 'pending': 'Pending', 'failed': 'Cancelled'}
+SHIPMENT_STATES = ['In Processing', 'Shipped', 'On Transit', 'Reached Destination', 'Out for delivery', 'Delivered']
+SHIPMENT_STATE_WEIGHTS = [0.05, 0.05, 0.05, 0.05, 0.05, 0.75]
+PAYMENT_TYPES = ['prepaid', 'pay on delivery']
+PAYMENT_METHODS = ['credit card', 'debit card', 'upi', 'cash']
+
+TOPICS = ['customer_created', 'inventory_created', 'order_created', 'payment_created', 'shipment_created']
+
+def money(values):
+    return [f'${value:,.2f}' for value in values.tolist()]
+
+def hex_ids(rng, n):
+    """
+    Returns n random UUID-formatted strings, cut from one hex string of random bytes.
+    """
+    h = rng.bytes(16 * n).hex()
+    return [f'{h[k:k + 8]}-{h[k + 8:k + 12]}-{h[k + 12:k + 16]}-{h[k + 16:k + 20]}-{h[k + 20:k + 32]}'
+            for k in range(0, 32 * n, 32)]
+
+def iso_times(micros):
+    return np.datetime_as_string(micros.astype('datetime64[us]'), unit='us', timezone='UTC').tolist()
+
+class OfflineEventGenerator:
+    """
+    Synthesizes order events without MySQL, the FastAPI services or OrderDetails.
+
+    Orders are generated in chunks: every column of a chunk (customers,
+    countries, items, amounts, payment and shipment statuses, event times) is
+    drawn with one vectorized NumPy call, so memory is bounded by the chunk
+    size and not by the total event count. json_records() renders a chunk into
+    the payloads of the five order topics, field for field what
+    order_payloads.build_order_messages() emits and pyspark/streaming.py
+    parses, or into the consolidated order_event record. arrow_tables() builds
+    the same records as Arrow tables straight from the columns.
+    """
+
+    def __init__(self, seed=None, customers=100000, max_items=5, orders_per_second=1000.0, start_time=None, late_seconds=30.0):
+        self.rng = np.random.default_rng(seed)
+        self.customers = customers
+        self.max_items = max_items
+        self.orders_per_second = orders_per_second  # spacing of simulated event times
+        self.late_seconds = late_seconds  # the five records of an order spread over up to this many seconds
+        start = start_time or datetime.now(timezone.utc)
+        self.next_micros = int(start.timestamp() * 1_000_000)
+        self.products = np.array([item[0] for item in CATALOG], dtype=object)
+        self.materials = np.array([item[1] for item in CATALOG], dtype=object)
+        self.sellers = np.array([item[2] for item in CATALOG], dtype=object)
+        self.prices = np.array([item[3] for item in CATALOG])
+        self.tax_rates = np.array([item[4] for item in CATALOG])
+        self.discount_rates = np.array([item[5] for item in CATALOG])
+
+    def chunk(self, n):
+        """
+        Draws the columns of n orders.
+        """
+        rng = self.rng
+        item_counts = rng.integers(1, self.max_items + 1, n)
+        offsets = np.concatenate([[0], np.cumsum(item_counts)])
+        catalog_index = rng.integers(0, len(CATALOG), offsets[-1])
+        quantity = rng.integers(1, 6, offsets[-1])
+        item_total = np.round(quantity * self.prices[catalog_index], 2)
+        subtotal = np.add.reduceat(item_total, offsets[:-1])
+        tax = np.round(np.add.reduceat(item_total * self.tax_rates[catalog_index], offsets[:-1]), 2)
+        discount = np.round(np.add.reduceat(item_total * self.discount_rates[catalog_index], offsets[:-1]), 2)
+
+        created = self.next_micros + np.sort(rng.integers(0, int(n / self.orders_per_second * 1_000_000) + 1, n))
+        self.next_micros = int(created[-1]) + 1
+        # eventTime of each topic, a little after the order was created
+        lag = rng.integers(0, int(self.late_seconds * 1_000_000) + 1, (len(TOPICS), n))
+
+        payment_status = rng.choice(len(PAYMENT_STATUSES), n, p=PAYMENT_STATUS_WEIGHTS)
+        shipment_state = rng.choice(len(SHIPMENT_STATES), n, p=SHIPMENT_STATE_WEIGHTS)
+        country = rng.integers(0, len(COUNTRIES), n)
+        return {
+            'n': n,
+            'orderId': hex_ids(rng, n),
+            'transactionId': hex_ids(rng, n),
+            'trackerId': hex_ids(rng, n),
+            'customerId': rng.integers(1, self.customers + 1, n).tolist(),
+            'country': [COUNTRIES[index] for index in country.tolist()],
+            'offsets': offsets.tolist(),
+            'product': self.products[catalog_index].tolist(),
+            'material': self.materials[catalog_index].tolist(),
+            'soldBy': self.sellers[catalog_index].tolist(),
+            'quantity': quantity.tolist(),
+            'totalPrice': money(item_total),
+            'itemsSubtotal': money(subtotal),
+            'tax': money(tax),
+            'discount': money(discount),
+            'grandTotal': money(np.round(subtotal + tax - discount, 2)),
+            'paymentStatus': [PAYMENT_STATUSES[index] for index in payment_status.tolist()],
+            'paymentType': [PAYMENT_TYPES[index] for index in rng.integers(0, len(PAYMENT_TYPES), n).tolist()],
+            'paymentMethod': [PAYMENT_METHODS[index] for index in rng.integers(0, len(PAYMENT_METHODS), n).tolist()],
+            'shippingStatus': [SHIPMENT_STATES[index] for index in shipment_state.tolist()],
+            'created_at': created,
+            'eventTime': {topic: created + lag[index] for index, topic in enumerate(TOPICS)}
+        }
+
+def topics_for(mode):
+    if mode == 'topics':
+        return TOPICS
+    if mode == 'envelope':
+        return ['order_event']
+    if mode == 'both':
+        return TOPICS + ['order_event']
+    raise ValueError(f'unknown order topic mode: {mode}')
+
+def json_records(chunk, mode='topics'):
+    """
+    Renders a chunk into {topic: [JSON text, ...]}, in the order of chunk['orderId'].
+
+    The payloads are formatted directly instead of going through dicts and
+    json.dumps; every value comes from the fixed vocabularies above, so none
+    needs escaping.
+    """
+    n = chunk['n']
+    offsets = chunk['offsets']
+    order_id = chunk['orderId']
+    customer_id = chunk['customerId']
+    country = chunk['country']
+    created_at = iso_times(chunk['created_at'])
+    event_time = {topic: iso_times(micros) for topic, micros in chunk['eventTime'].items()}
+    items = [f'{{"product": "{product}", "material": "{material}", "soldBy": "{seller}", '
+             f'"quantity": {quantity}, "totalPrice": "{total}"}}'
+             for product, material, seller, quantity, total in zip(
+                 chunk['product'], chunk['material'], chunk['soldBy'], chunk['quantity'], chunk['totalPrice'])]
+    items_ordered = ['[' + ', '.join(items[offsets[i]:offsets[i + 1]]) + ']' for i in range(n)]
+    summary = [f'{{"itemsSubtotal": "{subtotal}", "tax": "{tax}", "discount": "{discount}", "grandTotal": "{grand}"}}'
+               for subtotal, tax, discount, grand in zip(
+                   chunk['itemsSubtotal'], chunk['tax'], chunk['discount'], chunk['grandTotal'])]
+    order_status = [ORDER_STATUSES[status] for status in chunk['paymentStatus']]
+
+    records = {}
+    topics = topics_for(mode)
+    if 'customer_created' in topics:
+        records['customer_created'] = [
+            f'{{"orderId": "{order_id[i]}", "customerId": {customer_id[i]}, "name": "Customer {customer_id[i]}", '
+            f'"mobileNumber": "+1{customer_id[i]:010d}", "emailId": "customer{customer_id[i]}@example.com", '
+            f'"address": "{country[i]}", "eventTime": "{event_time["customer_created"][i]}"}}'
+            for i in range(n)]
+    if 'inventory_created' in topics:
+        records['inventory_created'] = [
+            f'{{"orderId": "{order_id[i]}", "itemsOrdered": {items_ordered[i]}, '
+            f'"eventTime": "{event_time["inventory_created"][i]}"}}'
+            for i in range(n)]
+    if 'order_created' in topics:
+        records['order_created'] = [
+            f'{{"orderId": "{order_id[i]}", "customerId": {customer_id[i]}, "orderStatus": "{order_status[i]}", '
+            f'"orderSummary": {summary[i]}, '
+            f'"created_at": "{created_at[i]}", "eventTime": "{event_time["order_created"][i]}"}}'
+            for i in range(n)]
+    if 'payment_created' in topics:
+        records['payment_created'] = [
+            f'{{"orderId": "{order_id[i]}", "transactionId": "{chunk["transactionId"][i]}", '
+            f'"paymentType": "{chunk["paymentType"][i]}", "paymentMethod": "{chunk["paymentMethod"][i]}", '
+            f'"amount": "{chunk["grandTotal"][i]}", "paymentStatus": "{chunk["paymentStatus"][i]}", '
+            f'"processedAt": "{created_at[i]}", "eventTime": "{event_time["payment_created"][i]}"}}'
+            for i in range(n)]
+    if 'shipment_created' in topics:
+        records['shipment_created'] = [
+            f'{{"orderId": "{order_id[i]}", "trackerId": "{chunk["trackerId"][i]}", '
+            f'"deliveryTo": {{"name": "Customer {customer_id[i]}", "mobileNumber": "+1{customer_id[i]:010d}", '
+            f'"address": "{country[i]}"}}, "shippingStatus": "{chunk["shippingStatus"][i]}", '
+            f'"updated_at": "{event_time["shipment_created"][i]}", "eventTime": "{event_time["shipment_created"][i]}"}}'
+            for i in range(n)]
+    if 'order_event' in topics:
+        records['order_event'] = [
+            f'{{"orderId": "{order_id[i]}", "customerId": {customer_id[i]}, "country": "{country[i]}", '
+            f'"itemsOrdered": {items_ordered[i]}, "orderStatus": "{order_status[i]}", "orderSummary": {summary[i]}, '
+            f'"created_at": "{created_at[i]}", "transactionId": "{chunk["transactionId"][i]}", '
+            f'"amount": "{chunk["grandTotal"][i]}", "paymentStatus": "{chunk["paymentStatus"][i]}", '
+            f'"trackerId": "{chunk["trackerId"][i]}", "shippingStatus": "{chunk["shippingStatus"][i]}", '
+            f'"eventTime": "{event_time["order_created"][i]}"}}'
+            for i in range(n)]
+    return records
+
+def arrow_tables(chunk, mode='topics'):
+    """
+    Builds {topic: pyarrow.Table} from the chunk columns, with the field names,
+    nesting and types of the streaming.py schemas.
+    """
+    import pyarrow as pa
+    timestamp = pa.timestamp('us', tz='UTC')
+    customer_id = pa.array([str(value) for value in chunk['customerId']])  # StringType in streaming.py
+    names = pa.array([f'Customer {value}' for value in chunk['customerId']])
+    mobile_numbers = pa.array([f'+1{value:010d}' for value in chunk['customerId']])
+    items = pa.StructArray.from_arrays(
+        [pa.array(chunk['product']), pa.array(chunk['material']), pa.array(chunk['soldBy']),
+         pa.array(chunk['quantity'], pa.int32()), pa.array(chunk['totalPrice'])],
+        ['product', 'material', 'soldBy', 'quantity', 'totalPrice'])
+    items_ordered = pa.ListArray.from_arrays(pa.array(chunk['offsets'], pa.int32()), items)
+    summary = pa.StructArray.from_arrays(
+        [pa.array(chunk['itemsSubtotal']), pa.array(chunk['tax']), pa.array(chunk['discount']), pa.array(chunk['grandTotal'])],
+        ['itemsSubtotal', 'tax', 'discount', 'grandTotal'])
+    created_at = pa.array(chunk['created_at'], timestamp)
+    event_time = {topic: pa.array(micros, timestamp) for topic, micros in chunk['eventTime'].items()}
+    order_status = pa.array([ORDER_STATUSES[status] for status in chunk['paymentStatus']])
+
+    tables = {}
+    topics = topics_for(mode)
+    if 'customer_created' in topics:
+        tables['customer_created'] = pa.table({
+            'orderId': chunk['orderId'], 'customerId': customer_id, 'name': names, 'mobileNumber': mobile_numbers,
+            'emailId': [f'customer{value}@example.com' for value in chunk['customerId']],
+            'address': chunk['country'], 'eventTime': event_time['customer_created']})
+    if 'inventory_created' in topics:
+        tables['inventory_created'] = pa.table({
+            'orderId': chunk['orderId'], 'itemsOrdered': items_ordered, 'eventTime': event_time['inventory_created']})
+    if 'order_created' in topics:
+        tables['order_created'] = pa.table({
+            'orderId': chunk['orderId'], 'customerId': customer_id, 'orderStatus': order_status, 'orderSummary': summary,
+            'created_at': created_at, 'eventTime': event_time['order_created']})
+    if 'payment_created' in topics:
+        tables['payment_created'] = pa.table({
+            'orderId': chunk['orderId'], 'transactionId': chunk['transactionId'], 'paymentType': chunk['paymentType'],
+            'paymentMethod': chunk['paymentMethod'], 'amount': chunk['grandTotal'], 'paymentStatus': chunk['paymentStatus'],
+            'processedAt': created_at, 'eventTime': event_time['payment_created']})
+    if 'shipment_created' in topics:
+        delivery_to = pa.StructArray.from_arrays([names, mobile_numbers, pa.array(chunk['country'])],
+                                                 ['name', 'mobileNumber', 'address'])
+        tables['shipment_created'] = pa.table({
+            'orderId': chunk['orderId'], 'trackerId': chunk['trackerId'], 'deliveryTo': delivery_to,
+            'shippingStatus': chunk['shippingStatus'], 'updated_at': event_time['shipment_created'],
+            'eventTime': event_time['shipment_created']})
+    if 'order_event' in topics:
+        tables['order_event'] = pa.table({
+            'orderId': chunk['orderId'], 'customerId': customer_id, 'country': chunk['country'],
+            'itemsOrdered': items_ordered, 'orderStatus': order_status, 'orderSummary': summary,
+            'created_at': created_at, 'transactionId': chunk['transactionId'], 'amount': chunk['grandTotal'],
+            'paymentStatus': chunk['paymentStatus'], 'trackerId': chunk['trackerId'],
+            'shippingStatus': chunk['shippingStatus'], 'eventTime': event_time['order_created']})
+    return tables
+
+class JsonLinesSink:
+    """
+    Writes one <topic>/part-<chunk>.jsonl file per topic and chunk, readable by
+    spark.read.schema(<topic schema>).json(...).
+    """
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+
+    def path(self, topic, chunk_index, extension):
+        os.makedirs(os.path.join(self.output_dir, topic), exist_ok=True)
+        return os.path.join(self.output_dir, topic, f'part-{chunk_index:05d}.{extension}')
+
+    def write(self, chunk_index, chunk, mode):
+        records = json_records(chunk, mode)
+        for topic, values in records.items():
+            with open(self.path(topic, chunk_index, 'jsonl'), 'w') as f:
+                f.write('\n'.join(values))
+                f.write('\n')
+        return sum(len(values) for values in records.values())
+
+    def close(self):
+        pass
+
+class ParquetSink(JsonLinesSink):
+    """
+    Writes one <topic>/part-<chunk>.parquet file per topic and chunk.
+    """
+
+    def write(self, chunk_index, chunk, mode):
+        import pyarrow.parquet as pq
+        tables = arrow_tables(chunk, mode)
+        for topic, table in tables.items():
+            pq.write_table(table, self.path(topic, chunk_index, 'parquet'))
+        return sum(table.num_rows for table in tables.values())
+
+class KafkaSink:
+    """
+    Produces every record keyed by its order id, with the producer's throughput
+    configuration and value encoding.
+    """
+
+    def __init__(self):
+        from confluent_kafka import Producer
+        from confluent_kafka_producer import throughput_conf, produce_message, encoder, metrics
+        self.producer = Producer(throughput_conf)
+        self.produce_message = produce_message
+        self.encoder = encoder
+        self.metrics = metrics
+
+    def write(self, chunk_index, chunk, mode):
+        records = json_records(chunk, mode)
+        for topic, values in records.items():
+            for order_id, value in zip(chunk['orderId'], values):
+                if self.encoder.name != 'json':
+                    value = self.encoder.encode(topic, json.loads(value))
+                self.produce_message(self.producer, topic, order_id, value, self.metrics)
+            self.producer.poll(0)
+        return sum(len(values) for values in records.values())
+
+    def close(self):
+        self.producer.flush()
+        self.metrics.dump(os.getenv('PRODUCER_METRICS_FILE'), self.producer)
+
+def run(generator, sink, orders, chunk_size, mode):
+    started = time.perf_counter()
+    events = 0
+    for chunk_index, first in enumerate(range(0, orders, chunk_size)):
+        events += sink.write(chunk_index, generator.chunk(min(chunk_size, orders - first)), mode)
+    sink.close()
+    elapsed = time.perf_counter() - started
+    return {
+        'orders': orders,
+        'events': events,
+        'elapsedSeconds': round(elapsed, 3),
+        'eventsPerSecond': round(events / elapsed, 1) if elapsed else None
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Generate synthetic order events without MySQL or the services.')
+    parser.add_argument('--orders', type=int, default=1000000, help='orders to generate, five events each in topics mode')
+    parser.add_argument('--chunk-size', type=int, default=50000, help='orders generated and written per chunk')
+    parser.add_argument('--sink', choices=['kafka', 'jsonl', 'parquet'], default='jsonl')
+    parser.add_argument('--output-dir', default='synthetic_events', help='directory of the jsonl and parquet sinks')
+    parser.add_argument('--mode', choices=['topics', 'envelope', 'both'], default=os.getenv('ORDER_TOPIC_MODE', 'topics'))
+    parser.add_argument('--orders-per-second', type=float, default=1000.0, help='simulated order rate that spaces the event times')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    if args.sink == 'kafka':
+        sink = KafkaSink()
+    elif args.sink == 'parquet':
+        sink = ParquetSink(args.output_dir)
+    else:
+        sink = JsonLinesSink(args.output_dir)
+    generator = OfflineEventGenerator(seed=args.seed, orders_per_second=args.orders_per_second)
+    print(json.dumps(run(generator, sink, args.orders, args.chunk_size, args.mode), indent=4))
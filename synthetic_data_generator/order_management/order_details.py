@@ -17,10 +17,16 @@ class DatabaseConnection:
     for committing or rolling back transactions before closing the connection.
     """
 
-    def __init__(self):
+    def __init__(self, conn=None):
         """
         Initializes the database connection using credentials stored in environment variables.
+        An already open connection can be passed in to be reused instead.
         """
+        if conn is not None:
+            self.conn = conn
+            # Buffered, so a fetchone() never leaves unread rows on the shared connection
+            self.cursor = self.conn.cursor(buffered=True)
+            return
         self.conn = mysql.connector.connect(
             host=os.getenv('MYSQL_HOST'),  # Database host (e.g., localhost or an IP address)
             user=os.getenv('MYSQL_USER'),  # Database username
@@ -114,9 +120,12 @@ class Inventory(DatabaseConnection):
         }for row in result]
 
 class OrderDetails(DatabaseConnection):
-    def __init__(self):
-        self.customer_details = Customer().customer_details()
-        self.inventory_details = Inventory().product_details()
+    def __init__(self, conn=None, session=None):
+        # A long running producer passes a shared connection and requests.Session
+        # so each order skips the connection and TCP handshakes.
+        self.customer_details = Customer(conn).customer_details()
+        self.inventory_details = Inventory(conn).product_details()
+        self.http = session or requests
         self.payment_type = random.choice(['prepaid','pay on delivery'])
         self.prepaid_payment_method = random.choice(['credit card','debit card','upi'])
         self.pod_payment_method = random.choice(['credit card','debit card','upi','cash'])
@@ -261,7 +270,7 @@ class OrderDetails(DatabaseConnection):
                     "created_at":created_at
                 }
 
-            response = requests.post(self.payment_gateway_url,json=payload,headers=self.headers)
+            response = self.http.post(self.payment_gateway_url,json=payload,headers=self.headers)
             response.raise_for_status()
             response_data = response.json().get("message")
             
@@ -301,7 +310,7 @@ class OrderDetails(DatabaseConnection):
         }
     
         try:
-            response = requests.post(self.shipment_url,json=shipment,headers=self.headers)
+            response = self.http.post(self.shipment_url,json=shipment,headers=self.headers)
             response.raise_for_status()
             response_data = response.json().get("message")
             
@@ -340,7 +349,7 @@ class OrderDetails(DatabaseConnection):
             'order_summary': self.summary,
             'created_at':created_at
         }
-        response = requests.post(self.order_url,json=data,headers=self.headers)
+        response = self.http.post(self.order_url,json=data,headers=self.headers)
         
         try:
             print('Status Code:', response.status_code)
@@ -355,7 +364,7 @@ class OrderDetails(DatabaseConnection):
             'order_status': order_status,
             'updated_at':updated_at
         }
-        response = requests.patch(self.order_url, json=data, headers=self.headers)
+        response = self.http.patch(self.order_url, json=data, headers=self.headers)
         
         try:
             print('Status Code:', response.status_code)
@@ -417,6 +426,7 @@ class OrderDetails(DatabaseConnection):
             "shippingDetails": shipment_details
         }
         
-obj = OrderDetails()
-data = obj.confirm_order()
-print(json.dumps(data,indent=4,ensure_ascii=False))
+if __name__ == "__main__":
+    obj = OrderDetails()
+    data = obj.confirm_order()
+    print(json.dumps(data,indent=4,ensure_ascii=False))
@@ -0,0 +1,113 @@
+import os
+from datetime import datetime, timezone
+
+# Kafka messages of a confirmed order, kept free of the MySQL, HTTP and Kafka
+# clients so benchmarks and generators can build payloads without them.
+# The topic mode comes from ORDER_TOPIC_MODE: 'topics' (default) the five
+# per-entity topics, 'envelope' one consolidated order_event record, 'both'
+# while consumers migrate.
+
+# Record type of each topic, carried in the recordType header now that keys are order ids
+TOPIC_RECORD_TYPES = {
+    "customer_created": "customer",
+    "inventory_created": "inventory",
+    "order_created": "order",
+    "payment_created": "payment",
+    "shipment_created": "shipment",
+    "order_event": "order_event"
+}
+
+# Helper function to get current UTC time in ISO 8601 format
+def current_event_time():
+    return datetime.now(timezone.utc).isoformat()
+
+# Function to build the five topic messages of one confirmed order
+def build_order_messages(order_data):
+    # Create output messages with event time
+    customer_output = {
+        "orderId": order_data["orderId"],
+        "customerId": order_data["customerDetails"]["id"],
+        "name": order_data["customerDetails"]["name"],
+        "mobileNumber": order_data["customerDetails"]["mobileNumber"],
+        "emailId": order_data["customerDetails"]["emailId"],
+        "address": order_data["customerDetails"]["address"]["country"],
+        "eventTime": current_event_time()
+    }
+
+    inventory_output = {
+        "orderId": order_data["orderId"],
+        "itemsOrdered": order_data["orderDetails"]["itemsOrdered"],
+        "eventTime": current_event_time()
+    }
+
+    order_output = {
+        "orderId": order_data["orderId"],
+        "customerId": order_data["customerDetails"]["id"],
+        "orderStatus": order_data["orderDetails"]["orderStatus"],
+        "orderSummary": order_data["orderDetails"]["orderSummary"],
+        "created_at": order_data["orderDetails"]["created_at"],
+        "eventTime": current_event_time()
+    }
+
+    payment_output = {
+        "orderId": order_data["orderId"],
+        "transactionId": order_data["paymentDetails"]["transactionId"],
+        "paymentType": order_data["paymentDetails"]["paymentType"],
+        "paymentMethod": order_data["paymentDetails"]["paymentMethod"],
+        "amount": order_data["paymentDetails"]["amount"],
+        "paymentStatus": order_data["paymentDetails"]["paymentStatus"],
+        "processedAt": order_data["paymentDetails"]["processedAt"],
+        "eventTime": current_event_time()
+    }
+
+    shipment_output = {
+        "orderId": order_data["orderId"],
+        "trackerId": order_data["shippingDetails"]["trackerId"] if order_data["shippingDetails"] else None,
+        "deliveryTo": order_data["shippingDetails"]["deliveryTo"] if order_data["shippingDetails"] else None,
+        "shippingStatus": order_data["shippingDetails"]["shippingStatus"] if order_data["shippingDetails"] else None,
+        "updated_at": order_data["shippingDetails"]["updated_at"] if order_data["shippingDetails"] else None,
+        "eventTime": current_event_time()
+    }
+
+    # Every message of an order is keyed by its order id, so traffic spreads over all
+    # partitions of a topic while the records of one order stay in order.
+    order_key = order_data["orderId"]
+    return [
+        ("customer_created", order_key, customer_output),
+        ("inventory_created", order_key, inventory_output),
+        ("order_created", order_key, order_output),
+        ("payment_created", order_key, payment_output),
+        ("shipment_created", order_key, shipment_output)
+    ]
+
+# Function to build the consolidated order_event record of one confirmed order. It carries
+# everything the Spark aggregation reads, so the job needs no stream-stream joins.
+def build_order_event(order_data):
+    shipping_details = order_data["shippingDetails"]
+    order_event = {
+        "orderId": order_data["orderId"],
+        "customerId": order_data["customerDetails"]["id"],
+        "country": order_data["customerDetails"]["address"]["country"],
+        "itemsOrdered": order_data["orderDetails"]["itemsOrdered"],
+        "orderStatus": order_data["orderDetails"]["orderStatus"],
+        "orderSummary": order_data["orderDetails"]["orderSummary"],
+        "created_at": order_data["orderDetails"]["created_at"],
+        "transactionId": order_data["paymentDetails"]["transactionId"],
+        "amount": order_data["paymentDetails"]["amount"],
+        "paymentStatus": order_data["paymentDetails"]["paymentStatus"],
+        "trackerId": shipping_details["trackerId"] if shipping_details else None,
+        "shippingStatus": shipping_details["shippingStatus"] if shipping_details else None,
+        "eventTime": current_event_time()
+    }
+    return ("order_event", order_data["orderId"], order_event)
+
+# Function to build the messages of one order for the configured topic mode
+def order_messages(order_data, mode=None):
+    mode = mode or os.getenv("ORDER_TOPIC_MODE", "topics")
+    if mode == "topics":
+        return build_order_messages(order_data)
+    if mode == "envelope":
+        return [build_order_event(order_data)]
+    if mode == "both":
+        return build_order_messages(order_data) + [build_order_event(order_data)]
+    raise ValueError(f"unknown order topic mode: {mode}")
@@ -0,0 +1,186 @@
+from confluent_kafka import Producer
+from dotenv import load_dotenv
+import mysql.connector
+import argparse
+import signal
+import json
+import time
+import os
+from event_encoding import get_encoder
+
+load_dotenv()
+
+# Schemas whose service write paths add rows to an outbox table.
+OUTBOX_SCHEMAS = [
+    os.getenv('USER_MANAGEMENT_DB'),
+    os.getenv('ORDER_MANAGEMENT_DB'),
+    os.getenv('TRANSACTION_MANAGEMENT_DB'),
+    os.getenv('SHIPPING_MANAGEMENT_DB')
+]
+
+# Producer tuned for throughput; idempotence keeps retries from reordering or duplicating within a partition.
+conf = {
+    'bootstrap.servers': os.getenv('KAFKA_BOOTSTRAP_SERVERS'),
+    'client.id': 'outbox-relay',
+    'enable.idempotence': True,
+    'acks': 'all',
+    'linger.ms': 20,
+    'batch.size': 262144,
+    'compression.type': 'lz4'
+}
+
+class DatabaseConnection:
+    """
+    This class handles the database connection and provides methods
+    for committing or rolling back transactions before closing the connection.
+    """
+
+    def __init__(self):
+        """
+        Initializes the database connection using credentials stored in environment variables.
+        """
+        self.conn = mysql.connector.connect(
+            host=os.getenv('MYSQL_HOST'),  # Database host (e.g., localhost or an IP address)
+            user=os.getenv('MYSQL_USER'),  # Database username
+            password=os.getenv('MYSQL_PASSWORD'),  # Database password
+        )
+        self.cursor = self.conn.cursor()  # Create a cursor object for executing SQL queries
+
+    def commit_and_close(self):
+        """
+        Commits the transaction and closes the database connection.
+        This should be used when operations are successfully completed.
+        """
+        self.conn.commit()  # Commit any pending database changes
+        self.cursor.close()  # Close the cursor
+        self.conn.close()  # Close the database connection
+
+    def rollback_and_close(self):
+        """
+        Rolls back the transaction and closes the database connection.
+        This should be used when an error occurs and changes should not be saved.
+        """
+        self.conn.rollback()  # Rollback any uncommitted changes
+        self.cursor.close()  # Close the cursor
+        self.conn.close()  # Close the database connection
+
+class OutboxRelay(DatabaseConnection):
+    """
+    Publishes outbox rows from every service schema to Kafka.
+
+    Each pass locks a batch of unpublished rows per schema, produces them
+    asynchronously, waits for the broker acknowledgements and marks only the
+    acknowledged rows as published in the same transaction that holds the
+    locks. Rows that fail to deliver stay unpublished and are retried on the
+    next pass, so delivery is at-least-once. SKIP LOCKED lets several relays
+    share the outbox without publishing the same row twice in parallel.
+    Payloads are stored as JSON and re-encoded with EVENT_ENCODING on the way
+    out, so the topics carry one encoding whichever producer wrote them.
+    """
+
+    def __init__(self,batch_size=5000,idle_sleep=0.5,retention_hours=24):
+        super().__init__()
+        self.batch_size = batch_size
+        self.idle_sleep = idle_sleep
+        self.retention_hours = retention_hours
+        self.producer = Producer(conf)
+        self.encoder = get_encoder()
+        self.running = True
+        self.published = 0
+        self.failed = 0
+
+    def stop(self,signum=None,frame=None):
+        self.running = False
+
+    def relay_schema(self,schema):
+        """
+        Publishes one batch of a schema's outbox and returns the number of rows published.
+        """
+        select_sql = f'''
+        SELECT id,topic,message_key,payload
+        FROM {schema}.outbox
+        WHERE published_at IS NULL
+        ORDER BY id
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED
+        '''
+        try:
+            self.cursor.execute(select_sql,(self.batch_size,))
+            rows = self.cursor.fetchall()
+            if not rows:
+                self.conn.commit()
+                return 0
+
+            delivered = []
+
+            def delivery_report(err,msg,outbox_id):
+                if err is not None:
+                    self.failed += 1
+                    print(f" Delivery failed for outbox row {schema}.{outbox_id}: {err}")
+                else:
+                    delivered.append(outbox_id)
+
+            for outbox_id,topic,message_key,payload in rows:
+                # The record type is the topic prefix, e.g. 'order' for order_created
+                value = payload if self.encoder.name == 'json' else self.encoder.encode(topic,json.loads(payload))
+                self.producer.produce(topic,key=message_key,value=value,
+                                      headers=[('recordType',topic.split('_')[0].encode())] + self.encoder.headers(topic),
+                                      on_delivery=lambda err,msg,outbox_id=outbox_id: delivery_report(err,msg,outbox_id))
+                self.producer.poll(0)
+            self.producer.flush()
+
+            if delivered:
+                placeholders = ','.join(['%s'] * len(delivered))
+                self.cursor.execute(
+                    f'UPDATE {schema}.outbox SET published_at = NOW() WHERE id IN ({placeholders})',
+                    tuple(delivered)
+                )
+            self.conn.commit()
+            self.published += len(delivered)
+            return len(delivered)
+        except mysql.connector.Error as e:
+            self.conn.rollback()
+            raise e
+
+    def purge(self):
+        """
+        Deletes published rows older than the retention period, in small chunks.
+        """
+        for schema in OUTBOX_SCHEMAS:
+            self.cursor.execute(
+                f'''DELETE FROM {schema}.outbox
+                WHERE published_at < NOW() - INTERVAL %s HOUR
+                LIMIT 10000''',
+                (self.retention_hours,)
+            )
+            self.conn.commit()
+
+    def run(self):
+        signal.signal(signal.SIGINT,self.stop)
+        signal.signal(signal.SIGTERM,self.stop)
+        last_purge = time.monotonic()
+        started = time.monotonic()
+
+        try:
+            while self.running:
+                published = sum(self.relay_schema(schema) for schema in OUTBOX_SCHEMAS)
+                if time.monotonic() - last_purge > 300:
+                    self.purge()
+                    last_purge = time.monotonic()
+                if published == 0:
+                    time.sleep(self.idle_sleep)
+        finally:
+            self.producer.flush()
+            self.commit_and_close()
+            elapsed = time.monotonic() - started
+            print(f" Relay stopped: {self.published} published, {self.failed} failed, "
+                  f"{self.published / elapsed if elapsed else 0:.1f} msg/s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Publish service outbox rows to Kafka.')
+    parser.add_argument('--batch-size',type=int,default=5000,help='outbox rows locked and published per schema per pass')
+    parser.add_argument('--idle-sleep',type=float,default=0.5,help='seconds to wait when every outbox is empty')
+    parser.add_argument('--retention-hours',type=int,default=24,help='hours to keep published outbox rows')
+    args = parser.parse_args()
+
+    OutboxRelay(batch_size=args.batch_size,idle_sleep=args.idle_sleep,retention_hours=args.retention_hours).run()
@@ -0,0 +1,67 @@
+from confluent_kafka import Producer
+import argparse
+import random
+import time
+import json
+from producer_metrics import ProducerMetrics
+from confluent_kafka_producer import conf, throughput_conf, produce_message, encoder
+from order_payloads import order_messages
+from sample_orders import sample_order_data
+
+def run_benchmark(mode, order_count, seed):
+    """
+    Publishes order_count synthetic orders and returns throughput figures.
+
+    'flush' mirrors the original producer: default configuration and a flush
+    after every order. 'throughput' uses the batched configuration, serves
+    callbacks with poll() and flushes once at the end.
+    """
+    rng = random.Random(seed)
+    orders = [sample_order_data(rng) for _ in range(order_count)]  # built up front, only Kafka is timed
+    kafka_producer = Producer(throughput_conf if mode == 'throughput' else conf)
+    metrics = ProducerMetrics()
+    payload_bytes = 0
+    messages = 0
+
+    started = time.perf_counter()
+    for order_data in orders:
+        for topic, key, payload in order_messages(order_data):
+            value = encoder.encode(topic, payload)
+            payload_bytes += len(key) + len(value)
+            messages += 1
+            produce_message(kafka_producer, topic, key, value, metrics)
+        if mode == 'throughput':
+            kafka_producer.poll(0)
+            metrics.sample_queue(kafka_producer)
+        else:
+            kafka_producer.flush()
+    kafka_producer.flush()
+    elapsed = time.perf_counter() - started
+    summary = metrics.snapshot()
+    latency = metrics.combined_latency()  # percentiles over all messages, not per topic
+
+    return {
+        'mode': mode,
+        'encoding': encoder.name,
+        'orders': order_count,
+        'messages': messages,
+        'delivered': summary['delivered'],
+        'failed': summary['failed'],
+        'errorsByCode': summary['errorsByCode'],
+        'maxQueueDepth': summary['maxQueueDepth'],
+        'p50LatencyMs': latency.percentile(0.50),
+        'p99LatencyMs': latency.percentile(0.99),
+        'elapsedSeconds': round(elapsed, 3),
+        'messagesPerSecond': round(messages / elapsed, 1),
+        'bytesPerSecond': round(payload_bytes / elapsed, 1)
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compare per-order flush against the batched producer mode.')
+    parser.add_argument('--orders', type=int, default=10000, help='orders to publish per mode')
+    parser.add_argument('--modes', default='flush,throughput', help='comma separated modes to run')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    for mode in args.modes.split(','):
+        print(json.dumps(run_benchmark(mode, args.orders, args.seed)))
@@ -0,0 +1,224 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from confluent_kafka import Producer
+from dotenv import load_dotenv
+import mysql.connector
+import requests
+import threading
+import argparse
+import signal
+import time
+import json
+import os
+from order_details import OrderDetails
+from confluent_kafka_producer import throughput_conf, transactional_conf, publish_order_messages, TransactionalPublisher
+from producer_metrics import ProducerMetrics
+
+load_dotenv()
+
+class ProducerDaemon:
+    """
+    Long running order producer.
+
+    The interpreter, imports, MySQL connection, HTTP session and Kafka producer
+    are created once and reused for every order, instead of paying for all of
+    them on each Airflow run. Orders are paced to a target rate (orders/sec)
+    that can be changed at runtime through the control endpoint. SIGTERM or
+    SIGINT stops the loop after the current order and flushes Kafka before exit.
+
+    In transactional mode orders are published in Kafka transactions of up to
+    orders_per_transaction orders, committed at least every
+    max_transaction_seconds, and the open transaction is committed on shutdown.
+    """
+
+    def __init__(self,rate,max_orders=None,health_timeout=60.0,transactional=False,
+                 orders_per_transaction=500,max_transaction_seconds=1.0):
+        self.rate = rate
+        self.max_orders = max_orders
+        self.health_timeout = health_timeout
+        self.running = True
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+        self.resumed_at = self.started_at
+        self.last_success_at = None
+        self.orders = 0
+        self.errors = 0
+        self.kafka_metrics = ProducerMetrics()  # per-topic delivery counters and latency histograms
+        self.last_error = None
+        self.conn = None
+        self.session = requests.Session()  # keep-alive connections to the FastAPI services
+        self.publisher = None
+        if transactional:
+            self.producer = Producer(transactional_conf)
+            self.producer.init_transactions(30)
+            self.publisher = TransactionalPublisher(self.producer,orders_per_transaction,
+                                                    max_transaction_seconds,callback=self.kafka_metrics)
+        else:
+            self.producer = Producer(throughput_conf)
+
+    def stop(self,signum=None,frame=None):
+        self.running = False
+
+    def set_rate(self,rate):
+        with self.lock:
+            if self.rate <= 0 < rate:
+                self.resumed_at = time.time()  # the health timeout restarts when a pause ends
+            self.rate = rate
+
+    def connection(self):
+        """
+        Returns the shared MySQL connection, reconnecting when the server dropped it.
+        """
+        if self.conn is None:
+            self.conn = mysql.connector.connect(
+                host=os.getenv('MYSQL_HOST'),
+                user=os.getenv('MYSQL_USER'),
+                password=os.getenv('MYSQL_PASSWORD'),
+                autocommit=True  # every random customer/product pick sees fresh data
+            )
+        else:
+            self.conn.ping(reconnect=True,attempts=3,delay=1)
+        return self.conn
+
+    def metrics(self):
+        kafka = self.kafka_metrics.snapshot(self.producer)
+        with self.lock:
+            uptime = time.time() - self.started_at
+            return {
+                'targetRate':self.rate,
+                'orders':self.orders,
+                'errors':self.errors,
+                'messagesDelivered':kafka['delivered'],
+                'messagesFailed':kafka['failed'],
+                'ordersPerSecond':round(self.orders / uptime,3) if uptime else 0.0,
+                'kafkaQueueLength':kafka['queueDepth'],
+                'committedTransactions':self.publisher.committed_transactions if self.publisher else None,
+                'abortedTransactions':self.publisher.aborted_transactions if self.publisher else None,
+                'uptimeSeconds':round(uptime,1),
+                'lastSuccessAt':self.last_success_at,
+                'lastError':self.last_error,
+                'kafka':kafka
+            }
+
+    def healthy(self):
+        # Healthy while deliberately paused, while starting up or resuming, and as long
+        # as an order succeeded recently.
+        if self.running and self.rate <= 0:
+            return True
+        reference = max(self.last_success_at or self.started_at,self.resumed_at)
+        return self.running and time.time() - reference < max(self.health_timeout,3 / self.rate)
+
+    def produce_one(self):
+        try:
+            order = OrderDetails(conn=self.connection(),session=self.session)
+            order_data = order.confirm_order()
+            if self.publisher:
+                self.publisher.publish(order_data)
+            else:
+                publish_order_messages(order_data,self.producer,callback=self.kafka_metrics,flush=False)
+            with self.lock:
+                self.orders += 1
+                self.last_success_at = time.time()
+        except Exception as e:
+            with self.lock:
+                self.errors += 1
+                self.last_error = str(e)
+            print(f" Order failed: {e}")
+
+    def run(self):
+        signal.signal(signal.SIGINT,self.stop)
+        signal.signal(signal.SIGTERM,self.stop)
+        next_due = time.monotonic()
+
+        try:
+            while self.running and (self.max_orders is None or self.orders < self.max_orders):
+                if self.publisher:
+                    self.publisher.maybe_commit()
+                rate = self.rate
+                if rate <= 0:
+                    # Paused, keep serving delivery callbacks
+                    self.producer.poll(0.5)
+                    next_due = time.monotonic()
+                    continue
+
+                delay = next_due - time.monotonic()
+                if delay > 0:
+                    # Wake up at least twice a second so open transactions are committed on time
+                    self.producer.poll(min(delay,0.5))
+                    continue
+
+                self.produce_one()
+                self.kafka_metrics.sample_queue(self.producer)
+                # Schedule from the previous due time so the average rate holds, but
+                # never bank more than a second of backlog after a slow order.
+                next_due = max(next_due + 1 / rate,time.monotonic() - 1)
+        finally:
+            if self.publisher:
+                self.publisher.commit()
+            self.producer.flush()
+            if self.conn is not None:
+                self.conn.close()
+            self.session.close()
+            print(json.dumps(self.metrics()))
+
+def make_handler(daemon):
+    class ControlHandler(BaseHTTPRequestHandler):
+        """
+        GET /health, GET /metrics and PUT /rate {"rate": <orders/sec>}.
+        """
+
+        def send_json(self,status_code,body):
+            payload = json.dumps(body).encode()
+            self.send_response(status_code)
+            self.send_header('Content-Type','application/json')
+            self.send_header('Content-Length',str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if self.path == '/health':
+                healthy = daemon.healthy()
+                self.send_json(200 if healthy else 503,{'status':'ok' if healthy else 'unhealthy'})
+            elif self.path == '/metrics':
+                self.send_json(200,daemon.metrics())
+            else:
+                self.send_json(404,{'error':'not found'})
+
+        def do_PUT(self):
+            if self.path != '/rate':
+                self.send_json(404,{'error':'not found'})
+                return
+            try:
+                length = int(self.headers.get('Content-Length',0))
+                rate = float(json.loads(self.rfile.read(length))['rate'])
+                if rate < 0:
+                    raise ValueError('rate must not be negative')
+            except (ValueError,KeyError,TypeError) as e:
+                self.send_json(400,{'error':str(e)})
+                return
+            daemon.set_rate(rate)
+            self.send_json(200,{'targetRate':rate})
+
+        def log_message(self,format,*args):
+            pass  # keep stdout for order logs
+
+    return ControlHandler
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Run the order producer as a long lived service.')
+    parser.add_argument('--rate',type=float,default=float(os.getenv('PRODUCER_RATE',1.0)),help='target orders per second, 0 pauses')
+    parser.add_argument('--max-orders',type=int,default=None,help='stop after this many orders')
+    parser.add_argument('--port',type=int,default=int(os.getenv('PRODUCER_PORT',8081)),help='port of the health and metrics endpoints')
+    parser.add_argument('--transactional',action='store_true',help='publish orders atomically in Kafka transactions')
+    parser.add_argument('--orders-per-transaction',type=int,default=500,help='orders per transaction in transactional mode')
+    parser.add_argument('--max-transaction-seconds',type=float,default=1.0,help='commit an open transaction after this many seconds')
+    args = parser.parse_args()
+
+    daemon = ProducerDaemon(args.rate,max_orders=args.max_orders,transactional=args.transactional,
+                            orders_per_transaction=args.orders_per_transaction,
+                            max_transaction_seconds=args.max_transaction_seconds)
+    server = ThreadingHTTPServer(('0.0.0.0',args.port),make_handler(daemon))
+    threading.Thread(target=server.serve_forever,daemon=True).start()
+    try:
+        daemon.run()
+    finally:
+        server.shutdown()
@@ -0,0 +1,184 @@
+from bisect import bisect_left
+import threading
+import time
+import json
+
+# Upper bounds (ms) of the delivery latency histogram buckets, the last bucket is unbounded
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+
+class LatencyHistogram:
+    """
+    Fixed-bucket histogram of produce-to-ack latencies in milliseconds.
+    """
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, latency_ms):
+        self.counts[bisect_left(LATENCY_BUCKETS_MS, latency_ms)] += 1
+        self.count += 1
+        self.total_ms += latency_ms
+        self.max_ms = max(self.max_ms, latency_ms)
+
+    def percentile(self, fraction):
+        """
+        Returns the upper bound of the bucket holding the given fraction of observations.
+        """
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return LATENCY_BUCKETS_MS[index] if index < len(LATENCY_BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'avgMs': round(self.total_ms / self.count, 3) if self.count else None,
+            'p50Ms': self.percentile(0.50),
+            'p95Ms': self.percentile(0.95),
+            'p99Ms': self.percentile(0.99),
+            'maxMs': round(self.max_ms, 3),
+            'buckets': {f'le{bound}': count for bound, count in zip(LATENCY_BUCKETS_MS, self.counts)} | {'inf': self.counts[-1]}
+        }
+
+def merge_snapshots(snapshots):
+    """
+    Combines the snapshots of several producers, e.g. the workers of the
+    sharded producer, into one. Counters and histogram buckets are summed and
+    the percentiles recomputed from the summed buckets.
+    """
+    topics = {}
+    errors = {}
+    for snapshot in snapshots:
+        for code, count in snapshot['errorsByCode'].items():
+            errors[code] = errors.get(code, 0) + count
+        for name, topic in snapshot['topics'].items():
+            merged = topics.setdefault(name, {'delivered': 0, 'failed': 0, 'bytes': 0, 'messagesPerSecond': 0.0,
+                                              'latency': LatencyHistogram()})
+            merged['delivered'] += topic['delivered']
+            merged['failed'] += topic['failed']
+            merged['bytes'] += topic['bytes']
+            merged['messagesPerSecond'] = round(merged['messagesPerSecond'] + topic['messagesPerSecond'], 1)
+            histogram = merged['latency']
+            latency = topic['latency']
+            histogram.counts = [a + b for a, b in zip(histogram.counts, list(latency['buckets'].values()))]
+            histogram.count += latency['count']
+            histogram.total_ms += (latency['avgMs'] or 0) * latency['count']
+            histogram.max_ms = max(histogram.max_ms, latency['maxMs'])
+    for topic in topics.values():
+        topic['latency'] = topic['latency'].snapshot()
+    return {
+        'elapsedSeconds': max((snapshot['elapsedSeconds'] for snapshot in snapshots), default=0.0),
+        'delivered': sum(topic['delivered'] for topic in topics.values()),
+        'failed': sum(topic['failed'] for topic in topics.values()),
+        'errorsByCode': errors,
+        'queueDepth': sum(snapshot['queueDepth'] for snapshot in snapshots),
+        'maxQueueDepth': sum(snapshot['maxQueueDepth'] for snapshot in snapshots),
+        'topics': topics
+    }
+
+class ProducerMetrics:
+    """
+    Delivery metrics of a Kafka producer, fed by its delivery callback.
+
+    An instance is passed as the produce() callback. Per topic it counts
+    delivered and failed messages and bytes, and keeps a histogram of the
+    produce-to-ack latency librdkafka measures for each message. Failures are
+    counted by error code. sample_queue() records the depth of the local
+    producer queue, so a growing backlog shows up before the queue fills.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+        self.topics = {}
+        self.errors = {}
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+
+    def topic(self, name):
+        if name not in self.topics:
+            self.topics[name] = {'delivered': 0, 'failed': 0, 'bytes': 0, 'latency': LatencyHistogram()}
+        return self.topics[name]
+
+    def __call__(self, err, msg):
+        latency = msg.latency()
+        with self.lock:
+            topic = self.topic(msg.topic())
+            if err is not None:
+                topic['failed'] += 1
+                self.errors[err.name()] = self.errors.get(err.name(), 0) + 1
+            else:
+                topic['delivered'] += 1
+                topic['bytes'] += len(msg.value() or b'')
+                if latency is not None:
+                    topic['latency'].observe(latency * 1000)
+
+    def sample_queue(self, kafka_producer):
+        depth = len(kafka_producer)
+        with self.lock:
+            self.queue_depth = depth
+            self.max_queue_depth = max(self.max_queue_depth, depth)
+
+    def totals(self):
+        with self.lock:
+            return {
+                'delivered': sum(topic['delivered'] for topic in self.topics.values()),
+                'failed': sum(topic['failed'] for topic in self.topics.values())
+            }
+
+    def combined_latency(self):
+        """
+        Returns one histogram holding the latency samples of every topic.
+        """
+        combined = LatencyHistogram()
+        with self.lock:
+            for topic in self.topics.values():
+                histogram = topic['latency']
+                combined.counts = [a + b for a, b in zip(combined.counts, histogram.counts)]
+                combined.count += histogram.count
+                combined.total_ms += histogram.total_ms
+                combined.max_ms = max(combined.max_ms, histogram.max_ms)
+        return combined
+
+    def snapshot(self, kafka_producer=None):
+        if kafka_producer is not None:
+            self.sample_queue(kafka_producer)
+        with self.lock:
+            elapsed = time.time() - self.started_at
+            topics = {
+                name: {
+                    'delivered': topic['delivered'],
+                    'failed': topic['failed'],
+                    'bytes': topic['bytes'],
+                    'messagesPerSecond': round(topic['delivered'] / elapsed, 1) if elapsed else 0.0,
+                    'latency': topic['latency'].snapshot()
+                } for name, topic in self.topics.items()
+            }
+            return {
+                'elapsedSeconds': round(elapsed, 3),
+                'delivered': sum(topic['delivered'] for topic in topics.values()),
+                'failed': sum(topic['failed'] for topic in topics.values()),
+                'errorsByCode': dict(self.errors),
+                'queueDepth': self.queue_depth,
+                'maxQueueDepth': self.max_queue_depth,
+                'topics': topics
+            }
+
+    def dump(self, path=None, kafka_producer=None):
+        """
+        Prints the JSON summary, or writes it to path when one is given.
+        """
+        summary = json.dumps(self.snapshot(kafka_producer), indent=4)
+        if path:
+            with open(path, 'w') as f:
+                f.write(summary)
+        else:
+            print(summary)
@@ -0,0 +1,69 @@
+from datetime import datetime
+import uuid
+
+# Small catalog in the shape of the inventory seed data, enough to give realistic payload sizes
+CATALOG = [
+    ('Chair', 'Wooden', 'Cummings and Sons', 887.52),
+    ('Chair', 'Plastic', 'Wise Inc', 448.58),
+    ('Car', 'Steel', 'Jones LLC', 114.24),
+    ('Car', 'Rubber', 'Simpson LLC', 180.53),
+    ('Computer', 'Plastic', 'Banks PLC', 56.15),
+    ('Computer', 'Metal', 'Smith Group', 64.78)
+]
+COUNTRIES = ['India', 'United States', 'United Kingdom', 'Canada', 'Australia']
+
+def sample_order_data(rng):
+    """
+    Builds an order dict shaped like OrderDetails.confirm_order() output, without MySQL or the APIs.
+    """
+    now = datetime.now().isoformat()
+    items = []
+    subtotal = 0.0
+    for product, material, seller, price in rng.sample(CATALOG, rng.randint(1, len(CATALOG))):
+        quantity = rng.randint(1, 5)
+        total = round(quantity * price, 2)
+        subtotal += total
+        items.append({
+            'product': product,
+            'material': material,
+            'soldBy': seller,
+            'quantity': quantity,
+            'totalPrice': f'${total:,.2f}'
+        })
+    grand_total = f'${subtotal * 1.12:,.2f}'
+    country = rng.choice(COUNTRIES)
+    return {
+        'orderId': str(uuid.uuid4()),
+        'customerDetails': {
+            'id': rng.randint(1, 100000),
+            'name': 'Benchmark Customer',
+            'mobileNumber': '+10000000000',
+            'emailId': 'benchmark@example.com',
+            'address': {'country': country, 'fullAddress': f'1 Main Street, City, State, 00000, {country}'}
+        },
+        'orderDetails': {
+            'itemsOrdered': items,
+            'orderSummary': {
+                'itemsSubtotal': f'${subtotal:,.2f}',
+                'tax': f'${subtotal * 0.12:,.2f}',
+                'discount': '$0.00',
+                'grandTotal': grand_total
+            },
+            'orderStatus': 'Confirmed',
+            'created_at': now
+        },
+        'paymentDetails': {
+            'transactionId': str(uuid.uuid4()),
+            'paymentType': 'prepaid',
+            'paymentMethod': 'upi',
+            'amount': grand_total,
+            'paymentStatus': 'paid',
+            'processedAt': now
+        },
+        'shippingDetails': {
+            'trackerId': str(uuid.uuid4()),
+            'deliveryTo': {'name': 'Benchmark Customer', 'mobileNumber': '+10000000000', 'address': 'Benchmark'},
+            'shippingStatus': 'Delivered',
+            'updated_at': now
+        }
+    }
@@ -0,0 +1,49 @@
+import argparse
+import random
+import timeit
+import json
+from order_payloads import build_order_messages
+from sample_orders import sample_order_data
+
+def serializers():
+    """
+    Returns the JSON serializers available here, each producing the bytes handed to producer.produce().
+    """
+    available = {'json': lambda payload: json.dumps(payload).encode()}
+    try:
+        import orjson
+        available['orjson'] = orjson.dumps
+    except ImportError:
+        pass
+    try:
+        import ujson
+        available['ujson'] = lambda payload: ujson.dumps(payload).encode()
+    except ImportError:
+        pass
+    return available
+
+def bench(serialize, payloads, repeat):
+    """
+    Returns the best time per payload in microseconds over repeat passes.
+    """
+    best = min(timeit.repeat(lambda: [serialize(payload) for payload in payloads], number=1, repeat=repeat))
+    return round(best / len(payloads) * 1_000_000, 3)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compare JSON serializers on the order response and the five event payloads.')
+    parser.add_argument('--orders', type=int, default=10000, help='synthetic orders per pass')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    orders = [sample_order_data(rng) for _ in range(args.orders)]  # shaped like the confirm_order response
+    payloads = {'confirm_order': orders}
+    for order_data in orders:
+        for topic, _, payload in build_order_messages(order_data):
+            payloads.setdefault(topic, []).append(payload)
+
+    results = {}
+    for name, serialize in serializers().items():
+        results[name] = {kind: bench(serialize, values, args.repeat) for kind, values in payloads.items()}
+    print(json.dumps({'microsecondsPerPayload': results}, indent=4))
@@ -0,0 +1,231 @@
+from dotenv import load_dotenv
+import multiprocessing
+import numpy as np
+import argparse
+import random
+import signal
+import queue
+import time
+import json
+import os
+from producer_metrics import ProducerMetrics, merge_snapshots
+
+load_dotenv()
+
+def live_orders(index, seed):
+    """
+    Returns a function that creates count orders through MySQL and the
+    services, with the worker's own connection, HTTP session and random seed.
+    """
+    import mysql.connector
+    import requests
+    from order_details import OrderDetails
+    from order_payloads import order_messages
+
+    random.seed(None if seed is None else seed * 1000 + index)  # OrderDetails picks with the random module
+    session = requests.Session()
+    conn = mysql.connector.connect(
+        host=os.getenv('MYSQL_HOST'),
+        user=os.getenv('MYSQL_USER'),
+        password=os.getenv('MYSQL_PASSWORD'),
+        autocommit=True
+    )
+
+    def next_orders(count):
+        conn.ping(reconnect=True, attempts=3, delay=1)
+        messages = []
+        for _ in range(count):
+            messages.extend(order_messages(OrderDetails(conn=conn, session=session).confirm_order()))
+        return messages
+
+    return next_orders
+
+def synthetic_orders(index, workers, seed, mode):
+    """
+    Returns a function that builds the messages of count orders with the
+    offline generator, seeded with the worker's shard of the seed sequence.
+    """
+    from offline_event_generator import OfflineEventGenerator, json_records
+    generator = OfflineEventGenerator(seed=np.random.SeedSequence(seed).spawn(workers)[index])
+
+    def next_orders(count):
+        chunk = generator.chunk(count)
+        messages = []
+        for topic, values in json_records(chunk, mode).items():
+            messages.extend(zip([topic] * count, chunk['orderId'], values))
+        return messages
+
+    return next_orders
+
+def run_worker(index, workers, source, mode, seed, rate, stop, reports, max_orders, chunk_size, report_interval):
+    """
+    Body of one worker process: its own Kafka producer and order source, paced
+    to the rate the parent sets in the shared value, reporting its metrics
+    snapshot to the parent every report_interval seconds.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the parent handles Ctrl+C and sets stop
+    from confluent_kafka import Producer
+    from confluent_kafka_producer import throughput_conf, produce_message, encoder
+
+    kafka_producer = Producer({**throughput_conf, 'client.id': f"{throughput_conf['client.id']}-{index}"})
+    metrics = ProducerMetrics()
+    next_orders = live_orders(index, seed) if source == 'live' else synthetic_orders(index, workers, seed, mode)
+    orders = 0
+    errors = 0
+    next_due = time.monotonic()
+    next_report = time.monotonic() + report_interval
+
+    try:
+        while not stop.is_set() and (max_orders is None or orders < max_orders):
+            target_rate = rate.value
+            now = time.monotonic()
+            if now >= next_report:
+                reports.put((index, orders, errors, metrics.snapshot(kafka_producer)))
+                next_report = now + report_interval
+            if target_rate > 0 and next_due > now:
+                kafka_producer.poll(min(next_due - now, 0.5))
+                continue
+
+            # Live orders are made one at a time; synthetic ones in slices of about 10 ms of the rate
+            count = 1 if source == 'live' else \
+                max(1, min(chunk_size, int(target_rate / 100) if target_rate > 0 else chunk_size))
+            if max_orders is not None:
+                count = min(count, max_orders - orders)
+            try:
+                for topic, key, payload in next_orders(count):
+                    if isinstance(payload, str):  # synthetic messages are JSON text already
+                        value = payload if encoder.name == 'json' else encoder.encode(topic, json.loads(payload))
+                    else:
+                        value = encoder.encode(topic, payload)
+                    produce_message(kafka_producer, topic, key, value, metrics)
+                orders += count
+            except Exception as e:
+                errors += 1
+                print(f" Worker {index} order failed: {e}")
+            kafka_producer.poll(0)
+            if target_rate > 0:
+                # Never bank more than a second of backlog after a slow slice
+                next_due = max(next_due + count / target_rate, time.monotonic() - 1)
+    finally:
+        kafka_producer.flush()
+        reports.put((index, orders, errors, metrics.snapshot(kafka_producer)))
+
+class ShardedProducer:
+    """
+    Runs the order producer in several worker processes.
+
+    Every worker owns its Kafka producer, order source and seed shard, so
+    workers share nothing but the shared rate value the parent writes. The
+    parent splits the global orders/sec target evenly across the live workers,
+    spreads it again when a worker exits, and merges the metrics snapshots the
+    workers report into one summary.
+    """
+
+    def __init__(self, workers, rate, source='synthetic', mode='topics', seed=None, max_orders=None,
+                 chunk_size=5000, report_interval=5.0):
+        self.workers = workers
+        self.rate = rate
+        self.report_interval = report_interval
+        self.context = multiprocessing.get_context('spawn')
+        self.stop_event = self.context.Event()
+        self.reports = self.context.Queue()
+        self.rates = [self.context.Value('d', 0.0) for _ in range(workers)]
+        self.latest = {}
+        self.processes = [self.context.Process(
+            target=run_worker,
+            args=(index, workers, source, mode, seed, self.rates[index], self.stop_event, self.reports,
+                  self.worker_orders(max_orders, index), chunk_size, report_interval),
+            name=f'order-producer-{index}'
+        ) for index in range(workers)]
+        self.set_rate(rate)
+
+    def worker_orders(self, max_orders, index):
+        """
+        Share of the max_orders total for one worker, the first max_orders % workers workers make one more.
+        """
+        if max_orders is None:
+            return None
+        return max_orders // self.workers + (1 if index < max_orders % self.workers else 0)
+
+    def stop(self, signum=None, frame=None):
+        self.stop_event.set()
+
+    def set_rate(self, rate):
+        """
+        Spreads the global orders/sec target over the workers still running, 0 runs them at full speed.
+        """
+        self.rate = rate
+        alive = [index for index, process in enumerate(self.processes) if process.exitcode is None]
+        for index in alive:
+            self.rates[index].value = rate / len(alive) if rate > 0 else 0.0
+
+    def drain(self, timeout):
+        try:
+            index, orders, errors, snapshot = self.reports.get(timeout=timeout)
+            self.latest[index] = {'orders': orders, 'errors': errors, 'kafka': snapshot}
+            while True:
+                index, orders, errors, snapshot = self.reports.get_nowait()
+                self.latest[index] = {'orders': orders, 'errors': errors, 'kafka': snapshot}
+        except queue.Empty:
+            pass
+
+    def summary(self):
+        return {
+            'workers': self.workers,
+            'targetRate': self.rate,
+            'orders': sum(worker['orders'] for worker in self.latest.values()),
+            'errors': sum(worker['errors'] for worker in self.latest.values()),
+            'perWorkerOrders': {index: worker['orders'] for index, worker in sorted(self.latest.items())},
+            'kafka': merge_snapshots([worker['kafka'] for worker in self.latest.values()])
+        }
+
+    def run(self):
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+        for process in self.processes:
+            process.start()
+        alive = self.workers
+        next_report = time.monotonic() + self.report_interval
+
+        try:
+            while alive:
+                self.drain(timeout=0.5)
+                still_alive = sum(process.is_alive() for process in self.processes)
+                if still_alive != alive:
+                    alive = still_alive
+                    self.set_rate(self.rate)  # hand the rate of finished workers to the others
+                if time.monotonic() >= next_report and self.latest:
+                    summary = self.summary()
+                    print(json.dumps({key: summary[key] for key in ('orders', 'errors', 'perWorkerOrders')} |
+                                     {'delivered': summary['kafka']['delivered'], 'failed': summary['kafka']['failed']}))
+                    next_report = time.monotonic() + self.report_interval
+        finally:
+            self.stop_event.set()
+            # Keep reading reports while workers flush, a worker cannot exit with unread queue data
+            while any(process.is_alive() for process in self.processes):
+                self.drain(timeout=0.1)
+            for process in self.processes:
+                process.join()
+            self.drain(timeout=0.1)
+        return self.summary()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Publish orders from several producer processes.')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='worker processes, one Kafka producer each')
+    parser.add_argument('--rate', type=float, default=0.0, help='global orders per second, 0 runs every worker at full speed')
+    parser.add_argument('--source', choices=['synthetic', 'live'], default='synthetic',
+                        help='offline generator, or MySQL and the services through OrderDetails')
+    parser.add_argument('--mode', choices=['topics', 'envelope', 'both'], default=os.getenv('ORDER_TOPIC_MODE', 'topics'))
+    parser.add_argument('--orders', type=int, default=None, help='total orders to publish, unlimited by default')
+    parser.add_argument('--seed', type=int, default=None, help='base seed, each worker gets its own shard of it')
+    parser.add_argument('--chunk-size', type=int, default=5000, help='largest slice of synthetic orders built at once')
+    parser.add_argument('--report-interval', type=float, default=5.0)
+    args = parser.parse_args()
+
+    sharded = ShardedProducer(args.workers, args.rate, source=args.source, mode=args.mode, seed=args.seed,
+                              max_orders=args.orders, chunk_size=args.chunk_size, report_interval=args.report_interval)
+    summary = sharded.run()
+    if os.getenv('PRODUCER_METRICS_FILE'):
+        with open(os.getenv('PRODUCER_METRICS_FILE'), 'w') as f:
+            json.dump(summary, f, indent=4)
+    print(json.dumps(summary, indent=4))
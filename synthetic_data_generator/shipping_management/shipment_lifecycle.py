@@ -0,0 +1,288 @@
+from confluent_kafka import Producer
+from dotenv import load_dotenv
+from datetime import datetime, timedelta, timezone
+import mysql.connector
+import requests
+import argparse
+import heapq
+import random
+import time
+import uuid
+import json
+import sys
+import os
+
+# The value encoders are shared with the order producers, so shipment_created follows EVENT_ENCODING too
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),'..','order_management'))
+from event_encoding import get_encoder
+
+load_dotenv()
+
+# Ordered shipment states, the same values the shipment gateway picks from.
+SHIPMENT_STATES = ['In Processing','Shipped','On Transit',
+                   'Reached Destination','Out for delivery','Delivered']
+
+# Mean simulated hours a shipment stays in a state before it moves to the next one.
+STATE_DWELL_HOURS = {
+    'In Processing': 6,
+    'Shipped': 12,
+    'On Transit': 36,
+    'Reached Destination': 8,
+    'Out for delivery': 4
+}
+
+class DatabaseConnection:
+    """
+    This class handles the database connection and provides methods
+    for committing or rolling back transactions before closing the connection.
+    """
+
+    def __init__(self):
+        """
+        Initializes the database connection using credentials stored in environment variables.
+        """
+        self.conn = mysql.connector.connect(
+            host=os.getenv('MYSQL_HOST'),  # Database host (e.g., localhost or an IP address)
+            user=os.getenv('MYSQL_USER'),  # Database username
+            password=os.getenv('MYSQL_PASSWORD'),  # Database password
+            database=os.getenv('SHIPPING_MANAGEMENT_DB')  # Target database name
+        )
+        self.cursor = self.conn.cursor()  # Create a cursor object for executing SQL queries
+
+    def commit_and_close(self):
+        """
+        Commits the transaction and closes the database connection.
+        This should be used when operations are successfully completed.
+        """
+        self.conn.commit()  # Commit any pending database changes
+        self.cursor.close()  # Close the cursor
+        self.conn.close()  # Close the database connection
+
+    def rollback_and_close(self):
+        """
+        Rolls back the transaction and closes the database connection.
+        This should be used when an error occurs and changes should not be saved.
+        """
+        self.conn.rollback()  # Rollback any uncommitted changes
+        self.cursor.close()  # Close the cursor
+        self.conn.close()  # Close the database connection
+
+class OpenTrackers(DatabaseConnection):
+    def fetch(self,limit,chunk_size=5000):
+        """
+        Yields every tracker whose latest status is not 'Delivered' yet.
+
+        The cursor is unbuffered, so rows are pulled from the server in chunks
+        and handed on one at a time instead of materialising the whole result
+        set on the client. The connection closes once the trackers are consumed.
+        """
+        query = '''
+        SELECT st.tracker_id,so.order_id,so.delivery_to,st.created_at,ss.shipment_status,ss.updated_at
+        FROM shipment_tracker st
+        INNER JOIN shipment_order so ON st.shipment_id = so.id
+        INNER JOIN shipment_status ss ON ss.tracker_id = st.tracker_id
+        WHERE ss.updated_at = (
+            SELECT MAX(latest.updated_at) FROM shipment_status latest
+            WHERE latest.tracker_id = st.tracker_id
+        )
+        AND ss.shipment_status <> 'Delivered'
+        LIMIT %s
+        '''
+        try:
+            self.cursor.execute(query,(limit,))
+            while True:
+                rows = self.cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield {
+                        'trackerId':row[0],
+                        'orderId':row[1],
+                        'deliveryTo':json.loads(row[2]),
+                        'created_at':row[3],
+                        'status':row[4],
+                        'updated_at':row[5]
+                    }
+            self.commit_and_close()
+        except mysql.connector.Error as e:
+            self.rollback_and_close()
+            raise e
+
+def synthetic_trackers(count,start_time):
+    """
+    Builds in-memory trackers in the first state, for load tests that only target Kafka.
+    """
+    return [{
+        'trackerId':str(uuid.uuid4()),
+        'orderId':str(uuid.uuid4()),
+        'deliveryTo':{'name':'Load Test','mobileNumber':'+10000000000','address':'Load Test'},
+        'created_at':start_time,
+        'status':SHIPMENT_STATES[0],
+        'updated_at':start_time
+    } for _ in range(count)]
+
+class ShipmentLifecycleSimulator:
+    """
+    Advances many open shipment trackers through the ordered shipment states over
+    simulated time.
+
+    Every tracker sits in a min-heap keyed by the simulated time of its next
+    transition. The simulator pops the trackers that are due, moves each one to
+    its next state, schedules the following transition with an exponentially
+    distributed dwell time and collects the status events into batches. Each
+    batch is posted to the bulk record endpoint and produced to the
+    'shipment_created' topic in one go.
+    """
+
+    def __init__(self,trackers,batch_size=1000,speedup=0.0,record=True,kafka=True,seed=None):
+        self.random = random.Random(seed)
+        self.batch_size = batch_size
+        self.speedup = speedup  # simulated seconds per wall second, 0 runs as fast as possible
+        self.record = record
+        self.base_url = os.getenv("API_BASE_URL")
+        self.headers = {"X-API-Key": os.getenv('API_KEY')}
+        self.record_url = f"{self.base_url}/shipment/shipment-gateway/record/bulk/"
+        self.producer = Producer({
+            'bootstrap.servers': os.getenv('KAFKA_BOOTSTRAP_SERVERS'),
+            'client.id': 'shipment-lifecycle-simulator'
+        }) if kafka else None
+        self.encoder = get_encoder()
+        self.heap = []
+        self.sequence = 0  # tie breaker so trackers are never compared with each other
+        self.events_emitted = 0
+        self.delivered = 0
+        for tracker in trackers:
+            self.schedule(tracker,tracker['updated_at'])
+
+    def schedule(self,tracker,from_time):
+        """
+        Pushes the tracker back on the heap with the time of its next transition.
+        """
+        if tracker['status'] == SHIPMENT_STATES[-1]:
+            self.delivered += 1
+            return
+        mean_hours = STATE_DWELL_HOURS[tracker['status']]
+        dwell = timedelta(hours=self.random.expovariate(1 / mean_hours))
+        self.sequence += 1
+        heapq.heappush(self.heap,(from_time + dwell,self.sequence,tracker))
+
+    def advance(self,tracker,event_time):
+        """
+        Moves the tracker to its next state and returns the resulting status event.
+        """
+        next_index = SHIPMENT_STATES.index(tracker['status']) + 1
+        tracker['status'] = SHIPMENT_STATES[next_index]
+        tracker['updated_at'] = event_time
+        return {
+            'trackerId':tracker['trackerId'],
+            'orderId':tracker['orderId'],
+            'deliveryTo':tracker['deliveryTo'],
+            'status':tracker['status'],
+            'created_at':tracker['created_at'].isoformat(),
+            'updated_at':event_time.isoformat()
+        }
+
+    def delivery_report(self,err,msg):
+        if err is not None:
+            print(f" Delivery failed for record {msg.key()}: {err}")
+
+    def emit(self,events):
+        """
+        Sends a batch of status events to the record path and to Kafka.
+        """
+        if not events:
+            return
+        if self.record:
+            response = requests.post(self.record_url,json=[{
+                'trackerId':event['trackerId'],
+                'status':event['status'],
+                'created_at':event['created_at'],
+                'updated_at':event['updated_at']
+            } for event in events],headers=self.headers)
+            response.raise_for_status()
+
+        if self.producer is not None:
+            event_time = datetime.now(timezone.utc).isoformat()
+            for event in events:
+                shipment_output = {
+                    "orderId": event['orderId'],
+                    "trackerId": event['trackerId'],
+                    "deliveryTo": event['deliveryTo'],
+                    "shippingStatus": event['status'],
+                    "updated_at": event['updated_at'],
+                    "eventTime": event_time
+                }
+                self.producer.produce("shipment_created", key=event['orderId'],
+                                      value=self.encoder.encode("shipment_created", shipment_output),
+                                      headers=[("recordType", b"shipment")] + self.encoder.headers("shipment_created"),
+                                      callback=self.delivery_report)
+                self.producer.poll(0)
+            self.producer.flush()
+
+        self.events_emitted += len(events)
+
+    def run(self,until=None):
+        """
+        Runs the simulation until every tracker is delivered or the simulated
+        clock passes `until`.
+        """
+        batch = []
+        started = time.perf_counter()
+        sim_start = self.heap[0][0] if self.heap else None
+
+        while self.heap:
+            due_time, _, tracker = self.heap[0]
+            if until is not None and due_time > until:
+                break
+
+            if len(batch) >= self.batch_size:
+                self.emit(batch)
+                batch = []
+
+            if self.speedup:
+                wall_due = started + (due_time - sim_start).total_seconds() / self.speedup
+                delay = wall_due - time.perf_counter()
+                if delay > 0:
+                    self.emit(batch)
+                    batch = []
+                    time.sleep(delay)
+
+            heapq.heappop(self.heap)
+            batch.append(self.advance(tracker,due_time))
+            self.schedule(tracker,due_time)
+
+        self.emit(batch)
+        elapsed = time.perf_counter() - started
+        return {
+            'eventsEmitted':self.events_emitted,
+            'delivered':self.delivered,
+            'stillOpen':len(self.heap),
+            'elapsedSeconds':round(elapsed,3),
+            'eventsPerSecond':round(self.events_emitted / elapsed,1) if elapsed else None
+        }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Simulate shipment trackers moving through their lifecycle.')
+    parser.add_argument('--trackers',type=int,default=10000,help='maximum number of open trackers to simulate')
+    parser.add_argument('--synthetic',action='store_true',help='generate trackers in memory instead of loading open ones from MySQL')
+    parser.add_argument('--batch-size',type=int,default=1000,help='status events per bulk record call and Kafka flush')
+    parser.add_argument('--speedup',type=float,default=0.0,help='simulated seconds per wall second, 0 runs as fast as possible')
+    parser.add_argument('--hours',type=float,default=None,help='stop after this many simulated hours')
+    parser.add_argument('--no-record',action='store_true',help='skip the shipment record endpoint')
+    parser.add_argument('--no-kafka',action='store_true',help='skip producing to Kafka')
+    parser.add_argument('--seed',type=int,default=None)
+    args = parser.parse_args()
+
+    now = datetime.now()
+    trackers = synthetic_trackers(args.trackers,now) if args.synthetic else OpenTrackers().fetch(args.trackers)
+    until = now + timedelta(hours=args.hours) if args.hours else None
+
+    simulator = ShipmentLifecycleSimulator(
+        trackers,
+        batch_size=args.batch_size,
+        speedup=args.speedup,
+        record=not (args.no_record or args.synthetic),
+        kafka=not args.no_kafka,
+        seed=args.seed
+    )
+    print(json.dumps(simulator.run(until=until),indent=4))
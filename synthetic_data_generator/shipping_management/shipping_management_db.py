@@ -83,10 +83,10 @@ class ShippingManagement(DatabaseConnection):
             CREATE TABLE shipment_status(
             id INT AUTO_INCREMENT PRIMARY KEY,
             tracker_id VARCHAR(255) NOT NULL,
-            updated_at DATETIME NOT NULL,
+            updated_at DATETIME(6) NOT NULL,
             shipment_status VARCHAR(20) NOT NULL,
             created_at DATETIME NOT NULL,
-            last_updated_at DATETIME NOT NULL,
+            last_updated_at DATETIME(6) NOT NULL,
             UNIQUE(tracker_id,last_updated_at),
             FOREIGN KEY (tracker_id) REFERENCES shipment_tracker(tracker_id) ON UPDATE CASCADE ON DELETE CASCADE
             )
@@ -96,7 +96,48 @@ class ShippingManagement(DatabaseConnection):
         except mysql.connector.Error as e:
             self.rollback_and_close()
             raise e
-    
+
+    def shipment_status_microseconds(self):
+        """
+        Migrates a shipment_status table created before its timestamps kept
+        microseconds. Bulk status inserts rely on the fractional seconds to
+        keep the statuses of one tracker within the same second apart and in
+        order, so existing tables must run this once.
+        """
+        try:
+            query = '''
+            ALTER TABLE shipment_status
+            MODIFY updated_at DATETIME(6) NOT NULL,
+            MODIFY last_updated_at DATETIME(6) NOT NULL
+        '''
+            self.cursor.execute(query)
+            return 'shipment status timestamps migrated to microseconds'
+        except mysql.connector.Error as e:
+            self.rollback_and_close()
+            raise e
+
+    def outbox_tb(self):
+        try:
+            query = '''
+            CREATE TABLE outbox(
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            topic VARCHAR(50) NOT NULL,
+            message_key VARCHAR(255) NOT NULL,
+            payload JSON NOT NULL,
+            created_at DATETIME NOT NULL,
+            published_at DATETIME NULL,
+            INDEX(published_at,id)
+            )
+        '''
+            self.cursor.execute(query)
+            return 'outbox table created successfully'
+        except mysql.connector.Error as e:
+            self.rollback_and_close()
+            raise e
+
 obj = ShippingManagement()
 
-print(obj.shipment_status_tb())
\ No newline at end of file
+print(obj.shipment_status_tb())
+print(obj.outbox_tb())
+# Tables created with second precision: run this instead of shipment_status_tb()
+# print(obj.shipment_status_microseconds())
\ No newline at end of file
@@ -0,0 +1,249 @@
+from dotenv import load_dotenv
+import mysql.connector
+import pandas as pd
+import numpy as np
+import argparse
+import time
+import json
+import os
+
+load_dotenv()
+
+SUMMARY_COLUMNS = ['order_id','grand_total_cents']
+PAYMENT_COLUMNS = ['order_id','transaction_id','amount_cents','payment_status','processed_at']
+
+class DatabaseConnection:
+    """
+    This class handles the database connection and provides methods
+    for committing or rolling back transactions before closing the connection.
+    """
+
+    def __init__(self):
+        """
+        Initializes the database connection using credentials stored in environment variables.
+        """
+        self.conn = mysql.connector.connect(
+            host=os.getenv('MYSQL_HOST'),  # Database host (e.g., localhost or an IP address)
+            user=os.getenv('MYSQL_USER'),  # Database username
+            password=os.getenv('MYSQL_PASSWORD'),  # Database password
+            database=os.getenv('TRANSACTION_MANAGEMENT_DB')  # Target database name
+        )
+        self.cursor = self.conn.cursor()  # Create a cursor object for executing SQL queries
+
+    def commit_and_close(self):
+        """
+        Commits the transaction and closes the database connection.
+        This should be used when operations are successfully completed.
+        """
+        self.conn.commit()  # Commit any pending database changes
+        self.cursor.close()  # Close the cursor
+        self.conn.close()  # Close the database connection
+
+    def rollback_and_close(self):
+        """
+        Rolls back the transaction and closes the database connection.
+        This should be used when an error occurs and changes should not be saved.
+        """
+        self.conn.rollback()  # Rollback any uncommitted changes
+        self.cursor.close()  # Close the cursor
+        self.conn.close()  # Close the database connection
+
+class OrderedStream(DatabaseConnection):
+    """
+    Streams a query ordered by order_id in fixed-size DataFrame chunks.
+
+    The cursor is unbuffered, so MySQL keeps the result set on the server and
+    only `chunk_size` rows live on the client at a time. Each stream owns its
+    own connection because a connection can only serve one unbuffered result.
+    """
+
+    def __init__(self,query,columns,chunk_size):
+        super().__init__()
+        self.columns = columns
+        self.chunk_size = chunk_size
+        self.cursor.execute(query)
+        self.exhausted = False
+
+    def next_chunk(self):
+        if self.exhausted:
+            return pd.DataFrame(columns=self.columns)
+        rows = self.cursor.fetchmany(self.chunk_size)
+        if len(rows) < self.chunk_size:
+            self.exhausted = True
+        return pd.DataFrame.from_records(rows,columns=self.columns)
+
+class PaymentReconciliation:
+    """
+    Reconciles order_management.order_summary.grand_total against
+    payment_transaction.amount with a sort-merge over both tables.
+
+    Both tables are read in order_id order. For every chunk of order summaries
+    the payments up to the chunk's last order_id are pulled in, the two frames
+    are compared with vectorized pandas/NumPy operations and the findings are
+    appended to CSV files. Memory stays bounded by the chunk size no matter how
+    many orders the tables hold.
+
+    Order ids are UUID strings, so the MySQL collation order of the index and
+    the Python string order used for the merge agree. Rows without an order id
+    cannot be merged and are left out; a NULL grand total or amount counts as 0,
+    so it shows up as an amount mismatch.
+    """
+
+    summary_query = '''
+    SELECT order_id,CAST(ROUND(grand_total * 100) AS SIGNED)
+    FROM order_management.order_summary
+    WHERE order_id IS NOT NULL
+    ORDER BY order_id
+    '''
+
+    payment_query = '''
+    SELECT pt.order_id,pt.transaction_id,CAST(ROUND(pt.amount * 100) AS SIGNED),
+           ps.payment_status,pt.processed_at
+    FROM payment_transaction pt
+    INNER JOIN payment_status ps ON pt.payment_status_id = ps.id
+    WHERE pt.order_id IS NOT NULL
+    ORDER BY pt.order_id,pt.processed_at
+    '''
+
+    def __init__(self,output_dir,chunk_size=100000,report_every=10):
+        self.output_dir = output_dir
+        self.chunk_size = chunk_size
+        self.report_every = report_every
+        self.counts = {
+            'orders':0,
+            'payments':0,
+            'matched':0,
+            'amountMismatches':0,
+            'missingPayments':0,
+            'duplicatePayments':0,
+            'orphanPayments':0
+        }
+        self.written = set()
+        os.makedirs(output_dir,exist_ok=True)
+
+    def write(self,name,frame):
+        """
+        Appends a finding frame to its CSV file, writing the header only once.
+        """
+        if frame.empty:
+            return
+        path = os.path.join(self.output_dir,f'{name}.csv')
+        frame.to_csv(path,mode='a',index=False,header=name not in self.written)
+        self.written.add(name)
+
+    def compare(self,summaries,payments):
+        """
+        Compares one chunk of order summaries with every payment row for the same orders.
+        """
+        self.counts['orders'] += len(summaries)
+        self.counts['payments'] += len(payments)
+
+        by_order = payments.groupby('order_id',sort=False)
+        # Rows arrive ordered by processed_at, so the last row is the current state of the payment.
+        latest = by_order.tail(1).set_index('order_id')
+        paid_counts = (payments['payment_status'].to_numpy() == 'paid')
+        paid_counts = pd.Series(paid_counts,index=payments['order_id']).groupby(level=0).sum()
+
+        merged = summaries.join(latest[['transaction_id','amount_cents','payment_status']],on='order_id',how='left')
+        has_payment = merged['transaction_id'].notna().to_numpy()
+
+        missing = merged.loc[~has_payment,['order_id','grand_total_cents']]
+
+        expected = merged['grand_total_cents'].fillna(0).to_numpy(dtype=np.int64)
+        actual = merged['amount_cents'].fillna(0).to_numpy(dtype=np.int64)
+        mismatch_mask = has_payment & (expected != actual)
+        mismatches = merged.loc[mismatch_mask].assign(
+            difference_cents=actual[mismatch_mask] - expected[mismatch_mask]
+        )
+
+        duplicates = paid_counts[paid_counts.to_numpy() > 1].rename('paid_payments').reset_index()
+        duplicates.columns = ['order_id','paid_payments']
+
+        orphans = latest.loc[~latest.index.isin(summaries['order_id'])].reset_index()
+
+        self.counts['matched'] += int(has_payment.sum() - mismatch_mask.sum())
+        self.counts['amountMismatches'] += int(mismatch_mask.sum())
+        self.counts['missingPayments'] += len(missing)
+        self.counts['duplicatePayments'] += len(duplicates)
+        self.counts['orphanPayments'] += len(orphans)
+
+        self.write('amount_mismatches',mismatches)
+        self.write('missing_payments',missing)
+        self.write('duplicate_payments',duplicates)
+        self.write('orphan_payments',orphans)
+
+    def report(self,started,final=False):
+        elapsed = time.perf_counter() - started
+        report = dict(self.counts)
+        report['elapsedSeconds'] = round(elapsed,3)
+        report['ordersPerSecond'] = round(self.counts['orders'] / elapsed,1) if elapsed else None
+        report['rowsPerSecond'] = round((self.counts['orders'] + self.counts['payments']) / elapsed,1) if elapsed else None
+        if final:
+            report['outputDir'] = self.output_dir
+        print(json.dumps(report))
+        return report
+
+    def run(self):
+        summary_stream = OrderedStream(self.summary_query,SUMMARY_COLUMNS,self.chunk_size)
+        payment_stream = OrderedStream(self.payment_query,PAYMENT_COLUMNS,self.chunk_size)
+        pending = pd.DataFrame(columns=PAYMENT_COLUMNS)  # payments read ahead of the current summary chunk
+        started = time.perf_counter()
+        chunks = 0
+
+        try:
+            while True:
+                summaries = summary_stream.next_chunk()
+                last_chunk = summary_stream.exhausted
+
+                if not summaries.empty:
+                    # Pull payments until the stream passes the last order of this chunk.
+                    upper = summaries['order_id'].iloc[-1]
+                    parts = [pending]
+                    while not payment_stream.exhausted and (parts[-1].empty or parts[-1]['order_id'].iloc[-1] <= upper):
+                        parts.append(payment_stream.next_chunk())
+                    payments = pd.concat(parts,ignore_index=True)
+
+                    in_range = payments['order_id'].to_numpy() <= upper
+                    pending = payments.loc[~in_range]
+                    payments = payments.loc[in_range]
+
+                    self.compare(summaries,payments)
+                    chunks += 1
+                    if chunks % self.report_every == 0:
+                        self.report(started)
+                if last_chunk:
+                    break
+
+            # Payments after the last order are all orphans. They are read in chunks as
+            # well, each cut before its last order so all rows of an order are compared together.
+            no_summaries = pd.DataFrame(columns=SUMMARY_COLUMNS)
+            while not pending.empty or not payment_stream.exhausted:
+                if payment_stream.exhausted:
+                    payments = pending
+                    pending = pending.iloc[0:0]
+                else:
+                    payments = pd.concat([pending,payment_stream.next_chunk()],ignore_index=True)
+                    if not payment_stream.exhausted:
+                        in_range = payments['order_id'].to_numpy() < payments['order_id'].iloc[-1]
+                        pending = payments.loc[~in_range]
+                        payments = payments.loc[in_range]
+                    else:
+                        pending = payments.iloc[0:0]
+                self.compare(no_summaries,payments)
+                chunks += 1
+                if chunks % self.report_every == 0:
+                    self.report(started)
+        finally:
+            summary_stream.commit_and_close()
+            payment_stream.commit_and_close()
+
+        return self.report(started,final=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Reconcile order grand totals against recorded payments.')
+    parser.add_argument('--chunk-size',type=int,default=100000,help='rows fetched per chunk from each table')
+    parser.add_argument('--output-dir',default='reconciliation_output',help='directory for the finding CSV files')
+    parser.add_argument('--report-every',type=int,default=10,help='print progress every N chunks')
+    args = parser.parse_args()
+
+    PaymentReconciliation(args.output_dir,chunk_size=args.chunk_size,report_every=args.report_every).run()
@@ -115,7 +115,27 @@ class TransactionManagement(DatabaseConnection):
         except mysql.connector.Error as e:
             self.rollback_and_close()
             raise e
-        
+
+    def outbox_tb(self):
+        try:
+            query = '''
+            CREATE TABLE outbox(
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            topic VARCHAR(50) NOT NULL,
+            message_key VARCHAR(255) NOT NULL,
+            payload JSON NOT NULL,
+            created_at DATETIME NOT NULL,
+            published_at DATETIME NULL,
+            INDEX(published_at,id)
+            )
+        '''
+            self.cursor.execute(query)
+            return 'outbox table created successfully'
+        except mysql.connector.Error as e:
+            self.rollback_and_close()
+            raise e
+
 obj = TransactionManagement()
 
-print(obj.payment_transaction_tb())
\ No newline at end of file
+print(obj.payment_transaction_tb())
+print(obj.outbox_tb())
\ No newline at end of file